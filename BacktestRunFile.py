@@ -16,6 +16,8 @@ from signalHandler import signalHandler
 from WeeklySummary import get_weekly_summary
 from TradeSummary import get_trade_summary
 from BacktestRunner import BacktestRunner
+from BatchRunner import runBatch
+from DataCatalog import updateCatalog, selectFiles
 
 ##IMPORTANT
 #If you are feeding the data as a directory and wishing the backtesting system to format/prep for report based on filename, please use .readAndPrepData().
@@ -61,22 +63,16 @@ broker_cost = broker_cost * factor
 runType = 1 #Pertains to how the objects are called (different for DL strategies) as well as if indicator dataframes are saved in history. 
     #Review BacktestRunner.runBacktest for further context
 
-backtestSummaries = pd.DataFrame()
+workers = None #Number of backtests run in parallel (one process per file). None uses every CPU, 1 runs each file in turn in this process.
+exportMode = 'csv' #How the History is exported: 'csv', 'parquet'/'feather' (requires pyarrow), 'npz', or 'summary' for the summary reports only.
 
-for file in dataFiles:
-    print("Running for file", file)
-    fileDir = os.path.join(dataFolder, file)
-    Backtest = BacktestRunner(startDate, endDate, inputRows, strategy, exportFolder)
-    Backtest.prepData(fileDir, use_dates)
-    Backtest.loadBroker(stop_loss, take_profit, guaranteed_sl, broker_cost, limit_type, dynamic_limits, hold_direction)
-    Backtest.runBacktest(runType)
-    singleSummary = Backtest.runReports()
-    backtestSummaries = pd.concat([backtestSummaries, singleSummary])
-    print("Total PnL: {}".format(round(Backtest.broker.total_profit, 6)))
-
-if len(dataFiles) > 1:
-    saveName = "BacktestSummary_" + datetime.datetime.now().strftime("%d%m%y-%H%M%S") + ".csv"
-    saveDir = os.path.join(Backtest.exportSubdir, saveName)
-    backtestSummaries.to_csv(saveDir, index = False)
-
-print("Backtests completed")
\ No newline at end of file
+#Guard required for the worker processes on Windows/macOS.
+if __name__ == "__main__":
+    fileDirs = [os.path.join(dataFolder, file) for file in dataFiles]
+    #The catalog (asset, frequency, dates etc. per file) is kept between runs, so files which can't fit the dates/input rows are skipped unopened.
+    catalog = updateCatalog(fileDirs)
+    fileDirs = selectFiles(catalog, startDate, endDate, inputRows) if use_dates else selectFiles(catalog, inputRowSize = inputRows)
+    brokerArgs = (stop_loss, take_profit, guaranteed_sl, broker_cost, limit_type, dynamic_limits, hold_direction)
+    backtestSummaries, failures = runBatch(fileDirs, strategy, startDate, endDate, inputRows, exportFolder, brokerArgs, runType, \
+        useDates = use_dates, workers = workers, exportMode = exportMode)
+    print("Total PnL: {}".format(round(backtestSummaries['Total P/L'].sum(), 6) if len(backtestSummaries) > 0 else 0))
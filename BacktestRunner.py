@@ -1,6 +1,7 @@
 from logging import exception
 from unittest import case
 import pandas as pd
+import numpy as np
 import pytz 
 import os
 import datetime
@@ -9,6 +10,13 @@ import time
 from signalHandler import signalHandler
 from WeeklySummary import get_weekly_summary
 from TradeSummary import get_trade_summary
+from PerformanceMetrics import getMetrics
+from ReportExport import checkExportMode, writeReports
+from WindowProvider import WindowProvider
+from DataCache import loadCache, saveCache
+from DataReader import readCsv, readCsvChunks, inferFrequency
+from OHLCStore import openStore, isStore, FrameStore
+from Resampler import resampleData
 
 #os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' #Mute cuda warnings
 #import tensorflow as tf 
@@ -26,7 +34,8 @@ class BacktestRunner:
         startDate (datetime): Starting date of backtest. Required for trimming dataset as well as report functionality.
         endDate (datetime): Ending date of backtest. Also required for trimming dataset as well as report functionality.
         inputRowSize (int): Minimum number of rows required to compute a signal based on the chosen strategy.
-        strategy (object): Trading Strategy object. See TradingStrategies for information on structure, and .runBacktest() for further context.
+        strategy (object): Trading Strategy class or object. See TradingStrategies for information on structure, and .runBacktest() for further context.
+            A class is constructed once, on first use (see .getStrategy()).
         exportParentFolder (str): Parent directory of where to export results files.
         storeIndicators(int): Integer used as Boolean flag on whether to store indicators calculated by strategy in the history results.
         """
@@ -45,48 +54,26 @@ class BacktestRunner:
 
         #Backtesting functionality
         self.broker = signalHandler
+        self.brokerClass = signalHandler
         self.strategy = strategy
+        self.strategyInstance = None
         self.storeIndicators = storeIndicators
   
-    def prepData(self, dataDir, useDates = 0):
+    def readData(self, dataDir):
         """
-        Function used to read and format data based on an input directory. Useful as automatically formats things within the object.
-        This function infers the delimitter to read as well as the assumes the frequency/asset.
-            The frequency is inferred by taking the minimum difference of the first five points.
-            The asset is inferred by assuming the filename is in the format {AssetName}_{ExtraArgs}.csv. Ie, separates "_" and uses the first result.
-        
+        Function used to read and normalise a data file - see .prepData().
+
         Parameters:
         dataDir (str): The directory of the input csv file.
-        useDates (int/Bool): A flag whether to trim the data based on the start/end dates input
-        """
-
-        #Set up export filename details
-        if "/" in dataDir:
-            dataFilename = dataDir.split("/")[-1]
-        elif "\\" in dataDir:
-            dataFilename = dataDir.split("\\")[-1]
-
-        self.asset = dataFilename.split("_")[0]
-        
-        fullData = pd.read_csv(dataDir, sep = None, engine = 'python')
-
-        #Establish time columns - seen cases where there are multiple (e.g. "Date", "Time").
-        timeCols = []
-        for colName in fullData.columns:
-            if 'date' in colName.lower() or 'time' in colName.lower():
-                timeCols.append(colName)
-
-        if len(timeCols) > 1:
-            timeCols = [timeCols]
 
-        #Easier to re-read data and parse_dates now.
-        #Note that this will combine the date/time columns into one if necessary, but that is significantly more simply to work with.
-        fullData = pd.read_csv(dataDir, sep = None, engine = 'python', parse_dates = timeCols)
+        Returns:
+        fullData (pd.DataFrame): The full dataset, with lower case column names and the parsed time column named 'time'.
+        frequencyStr (str): The inferred frequency, e.g. 'D1'.
+        """
 
-        #Now handle any extra characters (such as seen in MT5 export.)
-        #Easiest to convert all column names to lower case such that is consistent across other parts of the functionality. 
-        for oldCol in fullData.columns:
-            fullData.rename(columns = {oldCol: oldCol.replace('<', '').replace('>', '').replace('_', '').lower()}, inplace = True) 
+        #Single pass read - delimiter and time columns are sniffed from the start of the file, and MT5 style date/time columns merged.
+        #Column names are converted to lower case (and MT5's <> removed) such that is consistent across other parts of the functionality.
+        fullData = readCsv(dataDir)
 
         #Also easiest to rename the timecol to 'time' per other uses across backtests/signals
         fullData.rename(columns = {fullData.columns[0]: 'time'}, inplace = True) 
@@ -95,42 +82,75 @@ class BacktestRunner:
         # fullData['time'] = fullData['time'].dt.tz_localize(tz = pytz.utc)
 
         #Infer frequency
-        frequency = min(fullData['time'].diff(1)[1:6])
-        frequencyDict = {pd.Timedelta(1, 'D'): 'D1',\
-            pd.Timedelta(1, 'H'): 'H1',\
-                pd.Timedelta(15, 'm'): 'M15',\
-                    pd.Timedelta(5, 'm'): 'M5',\
-                        pd.Timedelta(1, 'm'): 'M1'}
-
-        if frequency in frequencyDict.keys():
-            self.frequencyStr = frequencyDict[frequency]
-        else:
-            raise Exception ("Unrecognised Frequency - please add to dictionary above or review any missing/inconsistent data.")
-
-        if useDates:
-            #Flag any errors with date inputs
-            if self.startDate >= fullData['time'].iloc[-1] or self.startDate > self.endDate or self.endDate <= fullData['time'].iloc[0]:
-                print("Date Input error - data dates vs input dates noted below:")
-                print("Input start date: {} | Input end date: {}".format(self.startDate, self.endDate))
-                print("Data start date : {} | Data end date:  {}".format(fullData['time'].iloc[0], fullData['time'].iloc[-1]))
-                raise Exception ("Input time does not work with data dates - please review input dates or dataset")
-            
-            #Trim the data to the required window
-            startIdx = fullData.index[fullData['time'] >= self.startDate][0]
-            startIdxAdj = max((startIdx - self.inputRowSize + 1), 0) #This allows the minimum input leading up to start date
-            endIdx =  min((fullData.index[fullData['time'] <= self.endDate][-1] + 1), fullData.index[-1])
-            self.data = fullData[startIdxAdj:endIdx].reset_index(drop = True)
-
-            #Flag any errors with input dates vs input row size
-            if len(fullData[startIdx:endIdx]) <= self.inputRowSize:
-                print("Date vs Input Row Size error - specified dates vs data size noted below:")
-                print("Input start date: {} | Input end date: {}".format(self.startDate, self.endDate))
-                print("Resulting data size: {}".format(len(fullData[startIdx:endIdx])))
-                print("Input row size: {}".format(self.inputRowSize))
-                raise Exception ("Input time does not work with input row size - please review input dates, input row size or dataset")
+        frequencyStr = inferFrequency(fullData['time'])
+
+        return fullData, frequencyStr
+
+    def prepData(self, dataDir, useDates = 0, useCache = 1, cacheDir = None, frequencyStr = None):
+        """
+        Function used to read and format data based on an input directory. Useful as automatically formats things within the object.
+        This function infers the delimitter to read as well as the assumes the frequency/asset.
+            The frequency is inferred by taking the minimum difference of the first five points.
+            The asset is inferred by assuming the filename is in the format {AssetName}_{ExtraArgs}.csv. Ie, separates "_" and uses the first result.
+        The formatted data is cached (see DataCache), such that following runs on an unchanged file skip reading the csv.
+        Data can be resampled to a higher timeframe (e.g. M1 to H1) with frequencyStr - resampled data is cached per frequency too.
+        
+        Parameters:
+        dataDir (str): The directory of the input csv file, or of an OHLCStore folder (see OHLCStore.csvToStore) - 
+            in which case the asset/frequency are read from the store, and only the date window is read from disk.
+            An asset of a multi asset Panel (Panel.loadPanel(...).getAsset(asset)) can be passed in the same way.
+        useDates (int/Bool): A flag whether to trim the data based on the start/end dates input
+        useCache (int/Bool): A flag whether to read/write the formatted data cache.
+        cacheDir (str = None): Cache folder. Defaults to DataCache.DEFAULT_CACHE_DIR.
+        frequencyStr (str = None): Frequency to resample the data to (see Resampler.resampleData), e.g. 'M15'. Defaults to the data's own frequency.
+        """
+
+        if isStore(dataDir):
+            #Memory mapped store - the date window is found by binary search, and only those rows (plus the warm up) are read from disk.
+            store = openStore(dataDir)
+            self.asset = store.asset
+            self.frequencyStr = store.frequencyStr
+            if frequencyStr is not None and frequencyStr != store.frequencyStr:
+                raise Exception ("Resampling {} to {} is only available for csv inputs - please pass the csv file.".format(store.frequencyStr, frequencyStr))
+
+            if useDates:
+                self.data = self.trimData(store)
+            else:
+                self.data = store.read()
 
         else:
-            self.data = fullData                    
+            #Set up export filename details
+            if "/" in dataDir:
+                dataFilename = dataDir.split("/")[-1]
+            elif "\\" in dataDir:
+                dataFilename = dataDir.split("\\")[-1]
+
+            self.asset = dataFilename.split("_")[0]
+
+            #Resampled data is cached separately per frequency, such that following runs skip both the csv and the resampling.
+            cached = loadCache(dataDir, cacheDir, frequencyStr) if useCache and frequencyStr is not None else None
+            if cached is None and useCache:
+                cached = loadCache(dataDir, cacheDir)
+
+            if cached is not None:
+                fullData, info = cached
+                self.frequencyStr = info['frequencyStr']
+            else:
+                fullData, self.frequencyStr = self.readData(dataDir)
+                if useCache:
+                    saveCache(dataDir, fullData, {'asset': self.asset, 'frequencyStr': self.frequencyStr}, cacheDir)
+
+            if frequencyStr is not None and frequencyStr != self.frequencyStr:
+                fullData = resampleData(fullData, self.frequencyStr, frequencyStr)
+                self.frequencyStr = frequencyStr
+                if useCache:
+                    saveCache(dataDir, fullData, {'asset': self.asset, 'frequencyStr': self.frequencyStr}, cacheDir, frequencyStr)
+
+            if useDates:
+                #Same window as a store - found by binary search, and a view of the loaded data.
+                self.data = self.trimData(FrameStore(fullData))
+            else:
+                self.data = fullData                    
 
         #Adjust the start/end date accordingly to line up with the actual data used - for result file naming purposes
         self.startDate = self.data['time'].iloc[self.inputRowSize-1]
@@ -139,13 +159,71 @@ class BacktestRunner:
         startDateStr = self.startDate.strftime("%d%m%y")
         endDateStr = self.endDate.strftime("%d%m%y")
 
-        asset = dataFilename.split("_")[0]
-        self.subFolderName = "{}_{}_{}".format(asset, startDateStr, endDateStr)
+        self.subFolderName = "{}_{}_{}".format(self.asset, startDateStr, endDateStr)
+
+    def locateStoreWindow(self, store, startDate = None, endDate = None):
+        """
+        Function used to find the startDate/endDate window within an OHLCStore by binary search, with the trimming and input checks of .prepData().
+        Loaded data is searched the same way by wrapping it in an OHLCStore.FrameStore.
+
+        Parameters:
+        store (OHLCStore): The data store.
+        startDate (datetime = None), endDate (datetime = None): The window. Defaults to the backtest start/end dates.
+
+        Returns:
+        startIdxAdj (int): First row of the window, including the inputRowSize - 1 rows leading up to the start date.
+        endIdx (int): Last row of the window (exclusive).
+        """
+
+        startDate = self.startDate if startDate is None else startDate
+        endDate = self.endDate if endDate is None else endDate
+
+        #Flag any errors with date inputs
+        if store.toStoreTime(startDate) >= store.arrays['time'][-1] or startDate > endDate or \
+            store.toStoreTime(endDate) <= store.arrays['time'][0]:
+            print("Date Input error - data dates vs input dates noted below:")
+            print("Input start date: {} | Input end date: {}".format(startDate, endDate))
+            print("Data start date : {} | Data end date:  {}".format(store.getTime(0), store.getTime(len(store) - 1)))
+            raise Exception ("Input time does not work with data dates - please review input dates or dataset")
+
+        #Trim to the required window - the first row at/after the start date, less the minimum input leading up to it,
+            #to the last row at/before the end date (keeping the final row clear, given open t+1 prices are used).
+        startIdx = store.searchTime(startDate, 'left')
+        startIdxAdj = max((startIdx - self.inputRowSize + 1), 0)
+        endIdx = min(store.searchTime(endDate, 'right'), len(store) - 1)
+
+        #Flag any errors with input dates vs input row size
+        if max(endIdx - startIdx, 0) <= self.inputRowSize:
+            print("Date vs Input Row Size error - specified dates vs data size noted below:")
+            print("Input start date: {} | Input end date: {}".format(startDate, endDate))
+            print("Resulting data size: {}".format(max(endIdx - startIdx, 0)))
+            print("Input row size: {}".format(self.inputRowSize))
+            raise Exception ("Input time does not work with input row size - please review input dates, input row size or dataset")
+
+        return startIdxAdj, endIdx
+
+    def trimData(self, store, startDate = None, endDate = None):
+        """
+        Function used to read the startDate/endDate window (plus the warm up rows) of a store - see .locateStoreWindow().
+        For repeated trimming of loaded data (e.g. walk forward style runs), wrap the data once in an OHLCStore.FrameStore -
+            each trim is then two binary searches and a view of the data, rather than masks over and a copy of the whole dataset.
+
+        Parameters:
+        store (OHLCStore): The data store, or an OHLCStore.FrameStore of loaded data.
+        startDate (datetime = None), endDate (datetime = None): The window. Defaults to the backtest start/end dates.
+
+        Returns:
+        data (pd.DataFrame): The window, indexed from 0.
+        """
+
+        startIdxAdj, endIdx = self.locateStoreWindow(store, startDate, endDate)
+        return store.read(startIdxAdj, endIdx)
 
     def loadBroker(self, stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection):
         """
         Function used to set up the broker/signal handler object based on passed parameters.
         See signalHandler for further information on the broker/signal handler inputs.
+        Can be called again to start from a fresh broker, e.g. to re-run the backtest on the same data with different parameters.
 
         Parameters:
         stopLoss (float): Stop loss level in absolute value, not pips.
@@ -155,10 +233,27 @@ class BacktestRunner:
         brokerCost (float): Flat cost of broker in absolute value, not pips.        
         """
 
-        self.broker = self.broker(stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection, self.data, self.asset, self.frequencyStr, \
+        self.broker = self.brokerClass(stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection, self.data, self.asset, self.frequencyStr, \
             self.startDate, self.endDate, self.storeIndicators)
     
-    def runBacktest(self, runType = 1):
+    def getStrategy(self):
+        """
+        Returns the strategy object used throughout the backtest and reports. Where the strategy was passed as a class (e.g. runType 1) 
+        it is constructed here once, rather than at every bar.
+
+        Returns:
+        strategy (object): The strategy object.
+        """
+
+        if self.strategyInstance is None:
+            if isinstance(self.strategy, type):
+                self.strategyInstance = self.strategy()
+            else:
+                self.strategyInstance = self.strategy
+
+        return self.strategyInstance
+
+    def runBacktest(self, runType = 1, engine = 'loop', continueStrategy = False):
         '''
         The main looping function for running the backtest. Implements interaction between the data, trading strategy and signal handler methods.
 
@@ -166,138 +261,332 @@ class BacktestRunner:
         runType(int): The type of run based on the strategy used. Differentiates between standard indicators, deep learning (which return no indicator df) 
             and charting indicator strategies that require instantiation in a different style:
         
-            1 - standard indicator strategy. Can return indicatorDF.
+            1 - standard indicator strategy. Can return indicatorDF. The strategy class is constructed once for the backtest.
             2 - Deep Learning - requires model/scaler upon instantiation before input into backtest (otherwise timely), and an indicator strategy class as input. 
                 Cannot return indicator DF
             3 - Charting - requires preliminary data upon instantiation before input into backtest. Can return indicatorDF. At this stage only set up/useful with ZigZag/ABCD.
+            4 - Vectorised - the strategy computes its indicators once over the full data via strategy().runVectorised(data), returning a signal array 
+                (one signal per row of data) and an indicatorDF aligned with the data. No per-bar windows are built. 
+                Note indicators with memory (e.g. RSI, ATR, MACD, pSAR) are calculated over the full history rather than the last inputRowSize rows,
+                so signals can differ from runType 1 where the inputRowSize window is shorter than the indicator needs to converge
+                (unless the strategy's on_bar updates streaming indicators with each bar, as the StreamingIndicators.StreamingStrategy strategies do).
+        engine(str): How signals are executed by the signal handler:
+            'loop' - the signal handler buy/sell/checkStopConditions methods are called at every iteration.
+            'kernel' - signals are collected first, then executed in a single pass of the array based execution kernel (see ExecutionKernel).
+                Results are identical. Combined with runType 4 no per bar Python loop is required at all.
+
+        For runTypes 1-3 the strategy receives the last inputRowSize rows as a view of the backtest data (see WindowProvider), which must not be modified.
+            Strategies which modify their input (e.g. adding indicator columns) should set the class attribute mutatesInput = True to receive a copy,
+            and strategies setting arrayInput = True receive a dict of read-only numpy arrays per column instead of a dataframe.
+
+        Strategy lifecycle for runTypes 1-3 - each step is optional, such that strategies only implementing .run() work as before:
+            .prepare(data) - called once with the full data before the first bar (a copy where mutatesInput = True).
+            .on_bar(window) - called at every bar with the window above, returning the same as .run(). Falls back to .run(window) if not defined.
+            .finalize() - called once after the last bar.
+            As the strategy object persists across bars, state can be carried from one bar to the next (e.g. incremental indicators).
+        continueStrategy (bool): Whether the strategy carries on from the previous .runBacktest() (e.g. the previous chunk of .runChunkedBacktest())
+            rather than starting afresh - .prepare() isn't called again, so state such as streaming indicators continues.
         '''
         startTime = time.time()
         #Need to start from negative 1 as we are using rowsize + 1 to capture open t+1
         index = self.inputRowSize - 1
         signal = 0
 
+        if engine not in ['loop', 'kernel']:
+            raise Exception ("Unknown engine - please use 'loop' or 'kernel'.")
+
         if runType == 2 and self.storeIndicators == 1:
             print("Note: Indicators can't be saved with history for runType 2 (DL) - Overriding this setting.")
             self.storeIndicators = 0
             self.broker.storeIndicators = 0
 
+        strategy = self.getStrategy()
+
+        if runType == 4:
+            #Vectorised strategies - signals and indicators are computed once over the full dataset.
+            signals, indicatorDf = strategy.runVectorised(self.data.copy())
+            signals = np.asarray(signals)
+            if len(signals) != len(self.data):
+                raise Exception ("Vectorised strategy returned {} signals for {} rows of data.".format(len(signals), len(self.data)))
+            if self.storeIndicators == 1 and indicatorDf is not None:
+                self.broker.storeIndicatorFrame(indicatorDf)
+
+        #Price arrays, read once rather than through a row lookup at every iteration.
+        timeVals = self.data['time']
+        openPrices = self.data['open'].values
+        highPrices = self.data['high'].values
+        lowPrices = self.data['low'].values
+        closePrices = self.data['close'].values
+
+        #Strategy windows are views of the data - copied only for strategies declaring they modify their input.
+        windowFeed = WindowProvider(self.data, self.inputRowSize)
+        mutatesInput = getattr(strategy, 'mutatesInput', False)
+        arrayInput = getattr(strategy, 'arrayInput', False)
+
+        if runType != 4:
+            if hasattr(strategy, 'prepare') and not continueStrategy:
+                strategy.prepare(self.data.copy() if mutatesInput else self.data)
+            onBar = strategy.on_bar if hasattr(strategy, 'on_bar') else strategy.run
+
+        if runType == 4 and engine == 'kernel':
+            #Signals are already known - skip straight to execution.
+            self.broker.signal_list[index:] = signals[index:len(self.data) - 1]
+            index = len(self.data) - 1
+
         #Set up Iteration and print commencing statement
         print("Commencing Backtest")
         while index <= len(self.data) - 2:
-            
-            inputs = self.data[index-self.inputRowSize+1:index+1].copy()
-            row = self.data.iloc[index]
 
-            openPriceT1 = self.data['open'].iloc[index+1]            
-            lowPrice = row['low']
-            highPrice = row['high']
-            closePrice = row['close']
+            if runType != 4:
+                if arrayInput:
+                    inputs = windowFeed.arrays(index)
+                else:
+                    inputs = windowFeed.window(index, copy = mutatesInput)
+
+            openPriceT1 = openPrices[index+1]
+            lowPrice = lowPrices[index]
+            highPrice = highPrices[index]
+            closePrice = closePrices[index]
 
             if runType == 1:
                 #Vanilla indicator strategies
-                strategy = self.strategy()
-                signal, indicatorDf = strategy.run(pd.DataFrame(inputs))
+                signal, indicatorDf = onBar(inputs)
                 self.broker.storeSignalAndIndicators(signal, indicatorDf, index)          
 
             elif runType == 2:
-                signal = self.strategy.run(pd.DataFrame(inputs))
+                signal = onBar(inputs)
                 self.broker.storeSignalAndIndicators(signal, None, index)          
             
             elif runType == 3:
-                signal, indicatorDf = self.strategy.run(pd.DataFrame(inputs))
+                signal, indicatorDf = onBar(inputs)
                 self.broker.storeSignalAndIndicators(signal, indicatorDf, index)          
 
-            if signal == 1:
-                self.broker.buy(openPriceT1, highPrice, lowPrice, closePrice, index)
-            elif signal == -1:
-                self.broker.sell(openPriceT1, highPrice, lowPrice, closePrice, index)
-            elif signal == 0:
-                self.broker.checkStopConditions(closePrice, highPrice, lowPrice, index)
-            else:
-                raise Exception ("Unknown Signal!")
+            elif runType == 4:
+                signal = int(signals[index])
+                self.broker.storeSignalAndIndicators(signal, None, index)
+
+            if engine == 'loop':
+                if signal == 1:
+                    self.broker.buy(openPriceT1, highPrice, lowPrice, closePrice, index)
+                elif signal == -1:
+                    self.broker.sell(openPriceT1, highPrice, lowPrice, closePrice, index)
+                elif signal == 0:
+                    self.broker.checkStopConditions(closePrice, highPrice, lowPrice, index)
+                else:
+                    raise Exception ("Unknown Signal!")
 
             index += 1
 
             #Show progress
-            if index % (round(0.01 * len(self.data), 0)) == 0:
+            if index % max(round(0.01 * len(self.data), 0), 1) == 0:
                 print("----- Backtest Progress: {}% as at date: {} | PnL: {} | Total Trades: {} -----".format(\
-                    round(100 * (index/len(self.data))), row['time'].strftime("%Y-%m-%d %H:%M"), round(self.broker.total_profit, 5), self.broker.trades_total), \
+                    round(100 * (index/len(self.data))), timeVals.iloc[index-1].strftime("%Y-%m-%d %H:%M"), round(self.broker.total_profit, 5), self.broker.trades_total), \
                         end = "\r", flush = True)
 
+        if runType != 4 and hasattr(strategy, 'finalize'):
+            strategy.finalize()
+
+        if engine == 'kernel':
+            self.broker.executeSignals(self.broker.signal_list, self.inputRowSize - 1)
+
         endTime = time.time()
         print("\nTimeConsumed: {}".format(datetime.timedelta(seconds = endTime - startTime)))
 
-    def runReports(self, suffix = None):
+    def runChunkedBacktest(self, dataDir, chunkSize, stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection, \
+        runType = 1, engine = 'kernel', useDates = 0):
         """
-        Function for running and exporting reports; History, Summary, Trade Summary and Weekly Summary.
-        Will create a subdirectory based on the BacktestRunner export folder input and save the 4 files. 
-            The subdirectory is named in the following fashion: {Strategy (where available)}_{Time_Date ran}_{Frequency}_{StartDate}_to_{EndDate}_{Suffix (where available)}
+        Out of core alternative to .prepData()/.loadBroker()/.runBacktest()/.runReports() for datasets too large to hold in memory.
+        The data is read chunkSize rows at a time, each chunk preceded by the last inputRowSize rows of the previous one
+            (the inputRowSize - 1 rows of strategy warm up, plus the final row of the previous chunk awaiting its open t+1 price).
+        Each chunk is backtested as per .runBacktest(), continuing from the broker state at the end of the previous chunk,
+            and its History rows are appended to the History file before the next chunk is read.
+        Peak memory therefore depends on chunkSize rather than the size of the dataset.
+
+        Results are identical to a full backtest for runTypes 1-3. Note that for runType 4 indicators with memory only see the chunk (see .runBacktest()),
+            and that strategy .prepare() is called before the first chunk only (so streaming indicators carry on across chunks), and .finalize() after every chunk.
+        The History, Summary and Trade Summary reports are exported - the Weekly Summary and Metrics are left out, as they are built from the full History.
 
         Parameters:
-        suffix (str = None): A suffix that can be appended to the export.
+        dataDir (str): The directory of the input csv file or OHLCStore folder - see .prepData().
+        chunkSize (int): Number of rows read per chunk. Must be larger than inputRowSize.
+        stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection: As per .loadBroker().
+        runType (int), engine (str): As per .runBacktest().
+        useDates (int/Bool): A flag whether to trim the data based on the start/end dates input. Requires an OHLCStore, where the window is found by binary search.
+
+        Returns:
+        summaryData (pd.DataFrame): The backtest Summary, as per .runReports().
         """
 
-        if hasattr(self.strategy(), 'Name'):
-            exportStratName = self.strategy().Name
+        if chunkSize <= self.inputRowSize:
+            raise Exception ("Chunk size must be larger than the input row size.")
+
+        if isStore(dataDir):
+            store = openStore(dataDir)
+            self.asset = store.asset
+            self.frequencyStr = store.frequencyStr
+            if useDates:
+                startIdxAdj, endIdx = self.locateStoreWindow(store)
+            else:
+                startIdxAdj, endIdx = 0, len(store)
+            chunks = (store.read(start, min(start + chunkSize, endIdx)) for start in range(startIdxAdj, endIdx, chunkSize))
         else:
-            try:
-                exportStratName = self.strategy.Name
-            except:
-                print("Unavailable to obtain strategy name. Perhaps review structure of strategy class. \n")
-                print("Saving in 'UndefinedStrategies'")
-                exportStratName = 'UndefinedStrategies'
+            if useDates:
+                raise Exception ("Date trimming of a chunked backtest requires an OHLCStore - see OHLCStore.csvToStore.")
+            self.asset = os.path.basename(dataDir).split("_")[0]
+            self.frequencyStr = None
+            chunks = readCsvChunks(dataDir, chunkSize)
 
-        exportSubdir = os.path.join(self.exportParentFolder, exportStratName)
+        #History is written to a temporary file until the date range (and so the export folder name) is known.
+        tempHistoryDir = os.path.join(self.exportParentFolder, "History_{}_{}.tmp".format(self.asset, os.getpid()))
+        if os.path.exists(tempHistoryDir):
+            os.remove(tempHistoryDir)
+
+        startTime = time.time()
+        carry = None
+        state = None
+        ledgers = []
+        firstDate = None
+        rowsDone = 0
+        try:
+            for chunk in chunks:
+                self.data = chunk if carry is None else pd.concat([carry, chunk], ignore_index = True)
+                if len(self.data) <= self.inputRowSize:
+                    #Not enough rows yet to execute a bar - wait for the next chunk.
+                    carry = self.data
+                    continue
+
+                if self.frequencyStr is None:
+                    self.frequencyStr = inferFrequency(self.data['time'])
+                if firstDate is None:
+                    firstDate = self.data['time'].iloc[self.inputRowSize - 1]
+                self.startDate = firstDate
+                self.endDate = self.data['time'].iloc[-2]
+
+                self.loadBroker(stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection)
+                if state is not None:
+                    self.broker.setState(state)
+                self.runBacktest(runType, engine, continueStrategy = state is not None)
+                state = self.broker.getState()
+
+                #Trade ledger - a trade carried into this chunk takes its entry from the previous chunk's open trade.
+                ledger = self.broker.getLedger()
+                if len(ledgers) > 0 and len(ledger) > 0 and ledger['Entry Index'].iloc[0] == -1:
+                    ledger.loc[0, ['Entry Time', 'Entry Price']] = ledgers[-1].iloc[-1][['Entry Time', 'Entry Price']].values
+                    ledgers[-1] = ledgers[-1].iloc[:-1]
+                ledgers.append(ledger)
+
+                historyData = self.broker.getHistory()
+                historyData = historyData.loc[self.inputRowSize-1:, :]
+                historyData.to_csv(tempHistoryDir, mode = 'a', header = (rowsDone == 0), index = False)
+                rowsDone += len(historyData)
+
+                #The last row has no open t+1 yet, so is executed with the next chunk.
+                carry = self.data.iloc[-self.inputRowSize:].reset_index(drop = True)
+
+                print("----- Chunked Backtest: {} bars as at date: {} | PnL: {} | Total Trades: {} -----".format(\
+                    rowsDone, self.endDate, round(self.broker.total_profit, 5), self.broker.trades_total))
+
+            if rowsDone == 0:
+                raise Exception ("Not enough data for a single bar of the backtest - please review the input row size or dataset")
+
+            self.subFolderName = "{}_{}_{}".format(self.asset, self.startDate.strftime("%d%m%y"), self.endDate.strftime("%d%m%y"))
+            subfolderDir = self.createExportFolder()
+            os.replace(tempHistoryDir, os.path.join(subfolderDir, "History.csv"))
+
+        finally:
+            if os.path.exists(tempHistoryDir):
+                os.remove(tempHistoryDir)
+
+        summaryData = self.broker.getSummary()
+        summaryData.to_csv(os.path.join(subfolderDir, "Summary.csv"), index = False)
+        get_trade_summary(pd.concat(ledgers, ignore_index = True)).to_csv(os.path.join(subfolderDir, "Trade_Summary.csv"), index = False)
+
+        print("\nChunked backtest finished | TimeConsumed: {}".format(datetime.timedelta(seconds = time.time() - startTime)))
+        print("Exports finalised\n", summaryData)
+
+        return summaryData
+
+    def createExportFolder(self):
+        """
+        Function used to create the export subdirectory for the backtest reports - see .runReports().
+
+        Returns:
+        subfolderDir (str): The created subdirectory.
+        """
 
-        #Check duplicate/overriding filenames/folders and handle.
-        if exportStratName not in os.listdir(self.exportParentFolder):
-            os.mkdir(exportSubdir)
+        if hasattr(self.getStrategy(), 'Name'):
+            exportStratName = self.getStrategy().Name
         else:
-            counter = 0
-            newFlag = False
-            originalSubfolder = self.subFolderName
-            while newFlag == False:
-                if self.subFolderName in os.listdir(exportSubdir):             
-                    counter += 1
-                    self.subFolderName = originalSubfolder + "_" + str(counter)
-                else:
-                    newFlag = True
-                if counter == 0:
-                    self.subFolderName = self.subFolderName
+            print("Unavailable to obtain strategy name. Perhaps review structure of strategy class. \n")
+            print("Saving in 'UndefinedStrategies'")
+            exportStratName = 'UndefinedStrategies'
+
+        exportSubdir = os.path.join(self.exportParentFolder, exportStratName)
+
+        #exist_ok as parallel backtests (see BatchRunner) can create this at the same time.
+        os.makedirs(exportSubdir, exist_ok = True)
+
+        #Handle duplicate/overriding folders - each name is claimed by creating it, rather than checked first,
+        #such that parallel backtests of the same asset and dates can't both take the same folder.
+        counter = 0
+        originalSubfolder = self.subFolderName
+        while True:
+            subfolderDir = os.path.join(exportSubdir, self.subFolderName)
+            try:
+                os.mkdir(subfolderDir)
+                break
+            except FileExistsError:
+                counter += 1
+                self.subFolderName = originalSubfolder + "_" + str(counter)
 
         self.exportSubdir = exportSubdir
 
-        subfolderDir = os.path.join(exportSubdir, self.subFolderName)
+        return subfolderDir
 
-        os.mkdir(subfolderDir)
+    def runReports(self, suffix = None, exportMode = 'csv', writer = None):
+        """
+        Function for running and exporting reports; History, Summary, Metrics, Trade Summary and Weekly Summary.
+        Will create a subdirectory based on the BacktestRunner export folder input and save the 5 files. 
+            The subdirectory is named in the following fashion: {Strategy (where available)}_{Time_Date ran}_{Frequency}_{StartDate}_to_{EndDate}_{Suffix (where available)}
+
+        Parameters:
+        suffix (str = None): A suffix that can be appended to the export.
+        exportMode (str = 'csv'): How the History is exported, one of ReportExport.EXPORT_MODES - 'csv', 'parquet'/'feather' (typed columns, requires pyarrow),
+            'npz' (typed columns, numpy only) or 'summary' (no History, which is then never built - e.g. for large sweeps of backtests).
+        writer (ReportExport.ReportWriter = None): A background writer to export through, such that the files are written while e.g. the next backtest runs.
+            The export folder is still created here. Where None, the files are written before returning.
+        """
+
+        checkExportMode(exportMode)
+        subfolderDir = self.createExportFolder()
 
         #History
-        historyData = self.broker.getHistory()
-        historyData = historyData.loc[self.inputRowSize-1:, :].reset_index(drop = True)
-        historyFilename = "History.csv"
-        historyDir = os.path.join(subfolderDir, historyFilename).replace('\\', '/')
+        if exportMode == 'summary':
+            #Only the columns the summaries are built from, without the input data or indicators.
+            historyData = self.broker.getReportColumns(self.inputRowSize - 1)
+        else:
+            historyData = self.broker.getHistory()
+            historyData = historyData.loc[self.inputRowSize-1:, :].reset_index(drop = True)
 
         #Summary
         summaryData = self.broker.getSummary()
-        summaryFilename = "Summary.csv"
-        summaryDir = os.path.join(subfolderDir, summaryFilename).replace('\\', '/')
+
+        #Risk/performance metrics
+        metricsData = getMetrics(historyData)
 
         #Weekly summary
         weeklySummaryData = get_weekly_summary(historyData, self.frequencyStr)
-        weeklySummaryFilename = "Weekly_Summary.csv"
-        weeklySummaryDir = os.path.join(subfolderDir, weeklySummaryFilename).replace('\\', '/')
 
         #Trade summary
-        tradeSummaryData = get_trade_summary(historyData)
-        tradeSummaryFilename = "Trade_Summary.csv"
-        tradeSummaryDir = os.path.join(subfolderDir, tradeSummaryFilename).replace('\\', '/')
+        tradeSummaryData = get_trade_summary(self.broker.getLedger())
 
-        #Exporting csvs
-        historyData.to_csv(historyDir, index = False)
-        summaryData.to_csv(summaryDir, index = False)
-        weeklySummaryData.to_csv(weeklySummaryDir, index = False)
-        tradeSummaryData.to_csv(tradeSummaryDir, index = False)
-
-        print("Exports finalised\n", summaryData)
+        #Exporting
+        reports = {"Summary.csv": summaryData, "Metrics.csv": metricsData, "Weekly_Summary.csv": weeklySummaryData, "Trade_Summary.csv": tradeSummaryData}
+        if writer is None:
+            writeReports(subfolderDir, historyData, reports, exportMode)
+            print("Exports finalised\n", summaryData)
+        else:
+            writer.submit(subfolderDir, writeReports, subfolderDir, historyData, reports, exportMode)
+            print("Exports queued\n", summaryData)
 
         return summaryData
\ No newline at end of file
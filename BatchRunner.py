@@ -0,0 +1,136 @@
+import pandas as pd
+import os
+import io
+import datetime
+import time
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from BacktestRunner import BacktestRunner
+from ReportExport import checkExportMode, ReportWriter
+
+def runSingleBacktest(fileDir, strategy, startDate, endDate, inputRowSize, exportFolder, brokerArgs, runType = 1, engine = 'loop', useDates = 0, \
+    storeIndicators = 1, quiet = False, exportMode = 'csv', writer = None):
+    """
+    Runs the full backtest (prepData, loadBroker, runBacktest, runReports) for a single data file.
+    Defined at module level such that it can be sent to worker processes.
+
+    Parameters:
+    fileDir (str): Directory of the input csv file - or anything else accepted by BacktestRunner.prepData, e.g. a Panel.PanelAsset.
+    strategy, startDate, endDate, inputRowSize, exportFolder, storeIndicators: As per BacktestRunner.
+    brokerArgs (tuple): (stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection), as per BacktestRunner.loadBroker.
+    runType (int), engine (str): As per BacktestRunner.runBacktest.
+    useDates (int/Bool): As per BacktestRunner.prepData.
+    quiet (bool): Whether to mute the backtest's progress prints (interleaved prints from several processes are unreadable).
+    exportMode (str), writer (ReportExport.ReportWriter = None): As per BacktestRunner.runReports.
+
+    Returns:
+    (summary, exportSubdir, subfolderDir) (tuple): The backtest Summary dataframe, the strategy export folder it was saved under
+        and the backtest's own export folder.
+    """
+
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        Backtest = BacktestRunner(startDate, endDate, inputRowSize, strategy, exportFolder, storeIndicators)
+        Backtest.prepData(fileDir, useDates)
+        Backtest.loadBroker(*brokerArgs)
+        Backtest.runBacktest(runType, engine)
+        summary = Backtest.runReports(exportMode = exportMode, writer = writer)
+
+    return summary, Backtest.exportSubdir, os.path.join(Backtest.exportSubdir, Backtest.subFolderName)
+
+def _runSafely(fileDir, *args, **kwargs):
+    #Failures are returned rather than raised, such that one bad file doesn't stop the batch.
+    try:
+        return fileDir, runSingleBacktest(fileDir, *args, **kwargs), None
+    except Exception:
+        return fileDir, None, traceback.format_exc()
+
+def runBatch(dataFiles, strategy, startDate, endDate, inputRowSize, exportFolder, brokerArgs, runType = 1, engine = 'loop', useDates = 0, \
+    storeIndicators = 1, workers = None, quiet = None, exportMode = 'csv'):
+    """
+    Runs one backtest per data file across a pool of worker processes, and exports a consolidated BacktestSummary csv.
+    Files failing (e.g. bad data or date windows) are reported and skipped, and do not stop the remaining files.
+
+    Note that the strategy (and anything it holds, e.g. for runType 2/3) must be picklable to be sent to the workers -
+        strategy classes (runType 1/4) always are. Use workers = 1 to run in this process instead.
+    With workers = 1 the reports are written on a background thread (see ReportExport.ReportWriter), while the next file is backtested.
+        A file whose reports fail to be written is reported as failed.
+
+    Parameters:
+    dataFiles (list of str): Directories of the input csv files. Assets of a Panel (Panel.getAsset) can be passed instead, 
+        which worker processes open as memory maps rather than re-reading the files.
+    strategy, startDate, endDate, inputRowSize, exportFolder, storeIndicators: As per BacktestRunner.
+    brokerArgs (tuple): (stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection), as per BacktestRunner.loadBroker.
+    runType (int), engine (str): As per BacktestRunner.runBacktest.
+    useDates (int/Bool): As per BacktestRunner.prepData.
+    workers (int = None): Number of worker processes. Defaults to the number of CPUs.
+    quiet (bool = None): Whether to mute each backtest's progress prints. Defaults to muting them only when running across several workers.
+    exportMode (str): How each backtest's History is exported, as per BacktestRunner.runReports - e.g. 'summary' to only export the summary reports.
+
+    Returns:
+    backtestSummaries (pd.DataFrame): The Summary of each successful backtest, in the order of dataFiles.
+    failures (dict): File directory -> traceback string, for each failed backtest.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if quiet is None:
+        quiet = workers != 1
+    #Checked up front rather than failing every backtest.
+    checkExportMode(exportMode)
+
+    startTime = time.time()
+    args = (strategy, startDate, endDate, inputRowSize, exportFolder, brokerArgs, runType, engine, useDates, storeIndicators, quiet, exportMode)
+
+    results = {}
+    failures = {}
+
+    def collect(fileDir, result, error):
+        if error is None:
+            results[fileDir] = result
+            print("Completed {} ({}/{})".format(fileDir, len(results) + len(failures), len(dataFiles)))
+        else:
+            failures[fileDir] = error
+            print("Failed {} ({}/{}):\n{}".format(fileDir, len(results) + len(failures), len(dataFiles), error))
+
+    if workers == 1:
+        writer = ReportWriter()
+        try:
+            for fileDir in dataFiles:
+                collect(*_runSafely(fileDir, *args, writer = writer))
+            writer.join()
+        finally:
+            writer.stop()
+
+        #Exports failing in the background are failures of their backtest.
+        for fileDir in [fileDir for fileDir in dataFiles if fileDir in results and results[fileDir][2] in writer.errors]:
+            failures[fileDir] = writer.errors[results.pop(fileDir)[2]]
+            print("Failed to export {}:\n{}".format(fileDir, failures[fileDir]))
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            futures = {pool.submit(_runSafely, fileDir, *args): fileDir for fileDir in dataFiles}
+            for future in as_completed(futures):
+                try:
+                    #Keyed by the submitted item, as items sent to the workers come back as copies (e.g. a Panel.PanelAsset).
+                    fileDir, result, error = future.result()
+                    collect(futures[future], result, error)
+                except Exception:
+                    #The worker process itself died (e.g. out of memory) - still isolated to this file.
+                    collect(futures[future], None, traceback.format_exc())
+
+    summaries = [results[fileDir][0] for fileDir in dataFiles if fileDir in results]
+    backtestSummaries = pd.concat(summaries, ignore_index = True) if len(summaries) > 0 else pd.DataFrame()
+
+    if len(summaries) > 1:
+        saveName = "BacktestSummary_" + datetime.datetime.now().strftime("%d%m%y-%H%M%S") + ".csv"
+        saveDir = os.path.join(results[next(fileDir for fileDir in dataFiles if fileDir in results)][1], saveName)
+        backtestSummaries.to_csv(saveDir, index = False)
+
+    print("Batch finished: {} completed, {} failed | TimeConsumed: {}".format(len(results), len(failures), \
+        datetime.timedelta(seconds = time.time() - startTime)))
+    if len(failures) > 0:
+        print("Failed files:", list(failures.keys()))
+
+    return backtestSummaries, failures
@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+import tempfile
+
+#Default cache location - kept out of the data folders, as those are listed for data files (see BacktestRunFile).
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DataCache')
+
+#Bumped whenever the normalised frame (see BacktestRunner.readData) changes, such that older cache files are rebuilt.
+CACHE_VERSION = 1
+
+def fileKey(dataDir):
+    """
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+
+    Returns:
+    key (dict): Path, size and modified time of the file. A cache entry is only valid while all three are unchanged.
+    """
+
+    stats = os.stat(dataDir)
+    return {'path': os.path.abspath(dataDir), 'size': stats.st_size, 'mtime': stats.st_mtime_ns, 'version': CACHE_VERSION}
+
+def getCachePath(dataDir, cacheDir = None, variant = None):
+    """
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+    cacheDir (str = None): Cache folder. Defaults to DEFAULT_CACHE_DIR.
+    variant (str = None): Name of a variant of the data derived from the file (e.g. a resampled frequency, see Resampler), cached separately.
+
+    Returns:
+    cachePath (str): The cache file for the input file - named by asset and a hash of the full path, so the same filename in different folders doesn't collide.
+    """
+
+    if cacheDir is None:
+        cacheDir = DEFAULT_CACHE_DIR
+
+    fullPath = os.path.abspath(dataDir)
+    pathHash = hashlib.sha1(fullPath.encode('utf-8')).hexdigest()[:16]
+    cacheName = "{}_{}".format(os.path.splitext(os.path.basename(fullPath))[0], pathHash)
+    if variant is not None:
+        cacheName += "_" + variant
+    return os.path.join(cacheDir, cacheName + ".npz")
+
+def loadCache(dataDir, cacheDir = None, variant = None):
+    """
+    Reads the normalised data for a file from the cache, where the cache entry is still valid for the file.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+    cacheDir (str = None): Cache folder. Defaults to DEFAULT_CACHE_DIR.
+    variant (str = None): As per getCachePath().
+
+    Returns:
+    (fullData, info) (tuple or None): The cached dataframe and its info dict (asset, frequencyStr etc.), or None where there is no valid cache entry.
+    """
+
+    cachePath = getCachePath(dataDir, cacheDir, variant)
+    if not os.path.exists(cachePath):
+        return None
+
+    try:
+        with np.load(cachePath, allow_pickle = True) as cached:
+            info = json.loads(str(cached['__info__']))
+            if info['key'] != fileKey(dataDir):
+                return None
+
+            columns = {}
+            for i, (column, kind) in enumerate(zip(info['columns'], info['kinds'])):
+                values = cached['c{}'.format(i)]
+                if kind == 'datetime':
+                    values = pd.to_datetime(values)
+                    if 'tz{}'.format(i) in cached.files:
+                        values = values.tz_localize('UTC').tz_convert(cached['tz{}'.format(i)][0])
+                columns[column] = values
+
+    except Exception as e:
+        #Unreadable/partially written cache files are simply rebuilt.
+        print("Ignoring unreadable cache file {}: {}".format(cachePath, e))
+        return None
+
+    return pd.DataFrame(columns), info
+
+def saveCache(dataDir, fullData, info, cacheDir = None, variant = None):
+    """
+    Writes the normalised data for a file to the cache, as one numpy array per column (npz).
+
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+    fullData (pd.DataFrame): The normalised data, as per BacktestRunner.readData.
+    info (dict): Any json serialisable details to store with the data (e.g. asset and frequencyStr).
+    cacheDir (str = None): Cache folder. Defaults to DEFAULT_CACHE_DIR.
+    variant (str = None): As per getCachePath().
+    """
+
+    cachePath = getCachePath(dataDir, cacheDir, variant)
+    os.makedirs(os.path.dirname(cachePath), exist_ok = True)
+
+    arrays = {}
+    kinds = []
+    for i, column in enumerate(fullData.columns):
+        series = fullData[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            kinds.append('datetime')
+            if getattr(series.dt, 'tz', None) is not None:
+                arrays['tz{}'.format(i)] = np.array([series.dt.tz], dtype = object)
+                series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            arrays['c{}'.format(i)] = series.values.astype('datetime64[ns]')
+        else:
+            #Anything else (e.g. times with mixed utc offsets, kept as objects) is stored as is.
+            kinds.append('values')
+            arrays['c{}'.format(i)] = np.asarray(series.values)
+
+    info = {**info, 'key': fileKey(dataDir), 'columns': list(fullData.columns), 'kinds': kinds}
+    arrays['__info__'] = np.array(json.dumps(info))
+
+    #Written to a temporary file first, so parallel backtests never read a partially written cache file.
+    fileHandle, tempPath = tempfile.mkstemp(dir = os.path.dirname(cachePath), suffix = '.tmp')
+    try:
+        with os.fdopen(fileHandle, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tempPath, cachePath)
+    except Exception:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
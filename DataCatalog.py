@@ -0,0 +1,223 @@
+import pandas as pd
+import os
+import json
+import hashlib
+import tempfile
+import contextlib
+import io
+
+from BacktestRunner import BacktestRunner
+from DataCache import DEFAULT_CACHE_DIR
+from DataReader import FREQUENCIES
+from OHLCStore import isStore, HEADER_FILENAME
+
+#Default catalog location, alongside the data cache.
+DEFAULT_CATALOG_PATH = os.path.join(DEFAULT_CACHE_DIR, 'Catalog.json')
+
+#Bumped whenever the catalog entries change, such that older catalogs are rebuilt.
+CATALOG_VERSION = 1
+
+def hashFile(path, blockSize = 1 << 20):
+    """
+    Parameters:
+    path (str): File to hash.
+    blockSize (int): Bytes read at a time.
+
+    Returns:
+    hash (str): sha1 hex digest of the file contents.
+    """
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blockSize), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+def readCatalog(catalogPath = None):
+    """
+    Parameters:
+    catalogPath (str = None): Catalog file. Defaults to DEFAULT_CATALOG_PATH.
+
+    Returns:
+    entries (dict): Full path -> catalog entry, as per updateCatalog(). Empty where there is no (readable, current version) catalog.
+    """
+
+    if catalogPath is None:
+        catalogPath = DEFAULT_CATALOG_PATH
+    if not os.path.exists(catalogPath):
+        return {}
+
+    try:
+        with open(catalogPath, 'r') as f:
+            catalog = json.load(f)
+    except Exception as e:
+        print("Ignoring unreadable catalog {}: {}".format(catalogPath, e))
+        return {}
+
+    return catalog['entries'] if catalog.get('version') == CATALOG_VERSION else {}
+
+def writeCatalog(entries, catalogPath = None):
+    #Written to a temporary file first, so parallel runs never read a partially written catalog.
+    if catalogPath is None:
+        catalogPath = DEFAULT_CATALOG_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(catalogPath)), exist_ok = True)
+
+    fileHandle, tempPath = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(catalogPath)), suffix = '.tmp')
+    try:
+        with os.fdopen(fileHandle, 'w') as f:
+            json.dump({'version': CATALOG_VERSION, 'entries': entries}, f, indent = 4)
+        os.replace(tempPath, catalogPath)
+    except Exception:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+def catalogEntry(dataDir, useCache = 1, cacheDir = None):
+    """
+    Reads a data file once to catalog it.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file (or OHLCStore folder).
+    useCache (int/Bool), cacheDir (str): As per BacktestRunner.prepData - the read also fills the data cache for the following backtest.
+
+    Returns:
+    entry (dict): Asset, frequency, first/last time (iso format), row count and columns of the file.
+    """
+
+    #Read as per a backtest, such that asset naming, parsing and the DataCache are all shared.
+    loader = BacktestRunner(None, None, 1, None, None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.prepData(dataDir, 0, useCache, cacheDir)
+
+    times = loader.data['time']
+    return {'file': os.path.basename(os.path.normpath(dataDir)), 'asset': loader.asset, 'frequencyStr': loader.frequencyStr, \
+        'start': pd.Timestamp(times.iloc[0]).isoformat(), 'end': pd.Timestamp(times.iloc[-1]).isoformat(), 'rows': len(loader.data), \
+        'columns': list(loader.data.columns)}
+
+def updateCatalog(dataFiles, catalogPath = None, useCache = 1, cacheDir = None):
+    """
+    Catalogs a set of data files - asset, frequency, first/last time, row count, columns and a content hash per file - and saves the catalog.
+    The catalog persists between runs and is refreshed incrementally: only files whose size/modified time changed are hashed,
+        and only files whose contents changed are read again.
+    Files which can't be read are reported and left out.
+
+    Parameters:
+    dataFiles (list of str): Directories of the input csv files (or OHLCStore folders).
+    catalogPath (str = None): Catalog file. Defaults to DEFAULT_CATALOG_PATH.
+    useCache (int/Bool), cacheDir (str): As per BacktestRunner.prepData, used when reading new/changed files.
+
+    Returns:
+    catalog (pd.DataFrame): One row per readable file (path, file, asset, frequencyStr, start, end, rows, columns, size, mtime, hash).
+    """
+
+    entries = readCatalog(catalogPath)
+    changed = False
+
+    for dataDir in dataFiles:
+        path = os.path.abspath(dataDir)
+        #Stores are keyed on their header, which is rewritten with the store.
+        statPath = os.path.join(path, HEADER_FILENAME) if isStore(path) else path
+        if not os.path.isfile(statPath):
+            continue
+
+        stats = os.stat(statPath)
+        entry = entries.get(path)
+        if entry is not None and entry['size'] == stats.st_size and entry['mtime'] == stats.st_mtime_ns:
+            continue
+
+        fileHash = hashFile(statPath)
+        if entry is None or entry['hash'] != fileHash:
+            try:
+                entry = catalogEntry(dataDir, useCache, cacheDir)
+            except Exception as e:
+                print("Catalog - unable to read {}: {}".format(dataDir, e))
+                entries.pop(path, None)
+                changed = True
+                continue
+
+        entries[path] = {**entry, 'size': stats.st_size, 'mtime': stats.st_mtime_ns, 'hash': fileHash}
+        changed = True
+
+    #Drop files which no longer exist.
+    for path in [path for path in entries if not os.path.exists(path)]:
+        del entries[path]
+        changed = True
+
+    if changed:
+        writeCatalog(entries, catalogPath)
+
+    paths = [os.path.abspath(dataDir) for dataDir in dataFiles]
+    return getCatalogFrame({path: entries[path] for path in paths if path in entries})
+
+def getCatalogFrame(entries):
+    """
+    Parameters:
+    entries (dict): Full path -> catalog entry.
+
+    Returns:
+    catalog (pd.DataFrame): One row per entry. The start/end columns hold Timestamps, with their utc offsets where the data has them.
+    """
+
+    catalog = pd.DataFrame([{'path': path, **entry} for path, entry in entries.items()], \
+        columns = ['path', 'file', 'asset', 'frequencyStr', 'start', 'end', 'rows', 'columns', 'size', 'mtime', 'hash'])
+    catalog['start'] = catalog['start'].map(pd.Timestamp)
+    catalog['end'] = catalog['end'].map(pd.Timestamp)
+    return catalog
+
+def matchTimezone(date, reference):
+    """
+    Parameters:
+    date (datetime): An input date, e.g. the backtest start date.
+    reference (pd.Timestamp): A data time.
+
+    Returns:
+    date (pd.Timestamp): The date, as wall clock time where the data times have no timezone (or localised where only the data has one),
+        as per OHLCStore.toStoreTime - such that the two can be compared.
+    """
+
+    date = pd.Timestamp(date)
+    if reference.tz is None and date.tz is not None:
+        return date.tz_localize(None)
+    if reference.tz is not None and date.tz is None:
+        return date.tz_localize(reference.tz)
+    return date
+
+def selectFiles(catalog, startDate = None, endDate = None, inputRowSize = None, frequencyStr = None, asset = None):
+    """
+    Picks the files of a catalog which can run a backtest with the given inputs, without opening them.
+    Files are only left out where prepData would certainly reject them - the date window is outside the data,
+        or holds no more than inputRowSize rows (bounded by the row count and the window length in bars).
+
+    Parameters:
+    catalog (pd.DataFrame): As per updateCatalog().
+    startDate, endDate (datetime = None): Backtest dates, as per BacktestRunner with useDates. None to use the full data.
+    inputRowSize (int = None): As per BacktestRunner.
+    frequencyStr (str = None): Only files of this frequency, e.g. 'D1'.
+    asset (str or list of str = None): Only these assets.
+
+    Returns:
+    dataFiles (list of str): The selected file paths, in catalog order.
+    """
+
+    selected = []
+    for row in catalog.itertuples(index = False):
+        if frequencyStr is not None and row.frequencyStr != frequencyStr:
+            continue
+        if asset is not None and row.asset not in ([asset] if isinstance(asset, str) else asset):
+            continue
+
+        maxRows = row.rows
+        if startDate is not None and endDate is not None:
+            start, end = matchTimezone(startDate, row.start), matchTimezone(endDate, row.start)
+            if start >= row.end or start > end or end <= row.start:
+                continue
+            windowLength = min(end, row.end) - max(start, row.start)
+            if row.frequencyStr in FREQUENCIES:
+                maxRows = min(maxRows, windowLength // FREQUENCIES[row.frequencyStr] + 1)
+
+        if inputRowSize is not None and maxRows <= inputRowSize:
+            continue
+
+        selected.append(row.path)
+
+    return selected
@@ -4,6 +4,69 @@ import os
 import numpy as np
 pd.options.mode.chained_assignment = None #Mute those warnings.
 
+def cleanTicks(ticksDat, timeCol):
+    """
+    Drops ticks with extreme spreads (> 1000pips, have seen this before) or a missing bid/ask.
+
+    Parameters:
+    ticksDat (pd.DataFrame): The ticks data, with timeCol, 'BID' and 'ASK' columns.
+    timeCol (str): The time column.
+
+    Returns:
+    ticksDat (pd.DataFrame): The valid ticks - time, bid and ask only.
+    """
+
+    #NaN spreads fail the comparison, so this clears out the nans too.
+    return ticksDat.loc[(abs(ticksDat['ASK'] - ticksDat['BID']) <= 0.1), [timeCol, 'BID', 'ASK']]
+
+def ticksToBars(ticksDir, floorFreq, chunkSize = 1000000, sep = "\t", timeCol = 'DATETIME'):
+    """
+    Streams an MT5 ticks export in chunks of rows, reducing it to the first valid tick of each (floored) bar - 
+        which is all ratesTicksConcatenator() uses from the ticks. Only one chunk of ticks is held in memory at a time,
+        so multi GB tick files can be used.
+    A bar which spans two chunks keeps the tick from the earlier chunk.
+
+    Parameters:
+    ticksDir (str): The directory of the ticks csv, with (MT5 style) <DATE>, <TIME>, <BID> and <ASK> columns.
+    floorFreq (str): As per ratesTicksConcatenator.
+    chunkSize (int): Number of ticks read per chunk.
+    sep (str): The csv delimiter - MT5 exports are tab separated.
+    timeCol (str): Name of the time column returned, matching the rates data.
+
+    Returns:
+    barTicks (pd.DataFrame): The first valid tick per bar - the tick time (not floored), 'BID' and 'ASK' - as an input to ratesTicksConcatenator().
+    """
+
+    reader = pd.read_csv(ticksDir, sep = sep, chunksize = chunkSize, dtype = {'<DATE>': str, '<TIME>': str})
+
+    barTicks = []
+    lastBar = None
+    for chunk in reader:
+        chunk.rename(columns = {oldCol: oldCol.replace('<', '').replace('>', '').replace('_', '') for oldCol in chunk.columns}, inplace = True)
+        times = chunk['DATE'] + ' ' + chunk['TIME']
+        try:
+            chunk[timeCol] = pd.to_datetime(times, format = '%Y.%m.%d %H:%M:%S.%f')
+        except ValueError:
+            chunk[timeCol] = pd.to_datetime(times)
+
+        chunk = cleanTicks(chunk, timeCol)
+        bars = chunk[timeCol].dt.floor(freq = floorFreq)
+        first = ~bars.duplicated().values
+        if lastBar is not None:
+            #Carried bar - its first tick was in an earlier chunk.
+            first &= (bars != lastBar).values
+        chunk = chunk[first]
+        if len(chunk) == 0:
+            continue
+
+        barTicks.append(chunk)
+        lastBar = bars[first].iloc[-1]
+
+    if len(barTicks) == 0:
+        raise Exception ("No valid ticks found in {}".format(ticksDir))
+
+    return pd.concat(barTicks, ignore_index = True)
+
 def ratesTicksConcatenator(ratesDat, ticksDat, floorFreq, ticksCleanFlag = 1, replacementSpread = 3):
     """
     A function used to combine MT5 rates data and ticks data in the same dataset, such that it can be fed into the backtest.
@@ -16,6 +79,7 @@ def ratesTicksConcatenator(ratesDat, ticksDat, floorFreq, ticksCleanFlag = 1, re
     ratesDat (pd.DataFrame): The rates data to be used.
     ticksDat (pd.DataFrame): The ticks data to be used.
         Note the column labels used assume a certain type of formatting before input, but this is outlayed in the example.
+        For large tick files, the first valid tick per bar from ticksToBars() gives the same result without reading every tick into memory.
     floorFreq (str): A string representation of an input to the pandas.Series.dt.floor function.
         This can be set to the frequency of the data by default, or adjust further if there are issues matching the data.
     ticksCleanFlag (int): The replacement policy when there is not an exact time match of ticks and rates:
@@ -62,93 +126,86 @@ def ratesTicksConcatenator(ratesDat, ticksDat, floorFreq, ticksCleanFlag = 1, re
 
     #Get occurences where there is both ASK & BID Data
    
-    #Replace extreme values (spread > 1000pips) - have seen this before 
-    extremeIdx = ticksDat.loc[abs(ticksDat['ASK'] - ticksDat['BID']) > 0.1].index.values
-    ticksDat.loc[extremeIdx, ['BID', 'ASK']] = np.nan
-    
-    #Clear out the rest of nans
-    ticksDat = ticksDat[-(ticksDat['ASK'].isnull() | ticksDat['BID'].isnull())]
-
-    #Floor
-    ticksDat.loc[:, timeCol] = ticksDat.loc[:,timeCol].dt.floor(freq = floorFreq)
-
-    #Merge
-    concatDF = ratesDat.merge(ticksDat, how = 'left', on = timeCol).groupby(timeCol).first().reset_index()
+    ticksDat = cleanTicks(ticksDat, timeCol).rename(columns = {timeCol: 'TICKTIME'})
+    if not ticksDat['TICKTIME'].is_monotonic_increasing:
+        ticksDat = ticksDat.sort_values('TICKTIME', kind = 'mergesort')
+
+    #Merge - the first tick at/after each rates time, kept only if it falls in the same (floored) period. 
+    #Same result as flooring the ticks and taking the first tick per period, without grouping the whole ticks set.
+    ratesDat = ratesDat.drop_duplicates(subset = timeCol).reset_index(drop = True)
+    #merge_asof requires both keys at the same resolution - e.g. ticksToBars() parses microsecond times under pandas 2+.
+    ratesDat[timeCol] = ratesDat[timeCol].astype('datetime64[ns]')
+    ticksDat['TICKTIME'] = ticksDat['TICKTIME'].astype('datetime64[ns]')
+    concatDF = pd.merge_asof(ratesDat, ticksDat, left_on = timeCol, right_on = 'TICKTIME', direction = 'forward')
+    outsidePeriod = (concatDF['TICKTIME'].dt.floor(freq = floorFreq) != concatDF[timeCol]).values
+    concatDF.loc[outsidePeriod, ['BID', 'ASK']] = np.nan
 
     #Replace values    
-    missingIDX = concatDF[concatDF['BID'].isnull() | concatDF['ASK'].isnull()].index.values
+    missing = (concatDF['BID'].isnull() | concatDF['ASK'].isnull()).values
 
     if ticksCleanFlag == 1:
         #Average spread of 5 behind / 5 forward rounded to nearest pip
         #NB if unavailable for forward 5 (near end of Data), shift this range back as appropriate (and vice versa if at the start)
             # EG if 4 indexes from the end, use 7 behind / 3 forward rather than 5 / 5
-        for idx in missingIDX:
-            if len(concatDF) - idx <= 5:
-                shiftFactor = (len(concatDF) - idx) - 6
-            elif idx <= 5:                
-                shiftFactor = 1 - idx
-            else:
-                shiftFactor = 0
-
-            #idxGroup = list(np.arange(idx-5+shiftFactor, idx)) + list(np.arange(idx+1, idx+6+shiftFactor))
-            #Update to only capture rolling window where bid/ask is already present from MT5.
-            idxGroup = list(concatDF[~concatDF['BID'].isnull() & ~concatDF['ASK'].isnull()].iloc[idx-5+shiftFactor:idx].index.values) \
-                + list(concatDF[~concatDF['BID'].isnull() & ~concatDF['ASK'].isnull()].iloc[idx:idx+6+shiftFactor-1].index.values)
-
-            avgBidSpread = round(np.mean(concatDF.loc[idxGroup,'CLOSE'] - concatDF.loc[idxGroup, 'BID']), 5)
-            avgAskSpread = round(np.mean(concatDF.loc[idxGroup, 'ASK'] - concatDF.loc[idxGroup, 'CLOSE']), 5)            
-            concatDF.loc[idx, 'BID'] = concatDF.loc[idx, 'CLOSE'] - avgBidSpread
-            concatDF.loc[idx, 'ASK'] = concatDF.loc[idx, 'CLOSE'] + avgAskSpread
+        #Only captures the rolling window where bid/ask is present from MT5 - ie a 10 point rolling mean over the valid rows only,
+            #taken at the window ending 5 valid rows after each missing row (clipped to the first/last 10 valid rows at the edges).
+        valid = ~missing
+        validCount = valid.sum()
+        if validCount > 0 and missing.any():
+            bidSpreads = (concatDF['CLOSE'] - concatDF['BID'])[valid].rolling(10, min_periods = 1).mean().values
+            askSpreads = (concatDF['ASK'] - concatDF['CLOSE'])[valid].rolling(10, min_periods = 1).mean().values
+
+            validBefore = np.cumsum(valid)[missing]
+            windowEnd = np.minimum(np.maximum(validBefore + 5, 10), validCount) - 1
+
+            avgBidSpread = np.round(bidSpreads[windowEnd], 5)
+            avgAskSpread = np.round(askSpreads[windowEnd], 5)
+            concatDF.loc[missing, 'BID'] = concatDF.loc[missing, 'CLOSE'].values - avgBidSpread
+            concatDF.loc[missing, 'ASK'] = concatDF.loc[missing, 'CLOSE'].values + avgAskSpread
 
     elif ticksCleanFlag == 2:
         #Flat spread
-        for idx in missingIDX:
-            concatDF.loc[idx, 'BID'] = concatDF.loc[idx, 'CLOSE'] - (replacementSpread/10000)
-            concatDF.loc[idx, 'ASK'] = concatDF.loc[idx, 'CLOSE'] + (replacementSpread/10000)
+        concatDF.loc[missing, 'BID'] = concatDF.loc[missing, 'CLOSE'] - (replacementSpread/10000)
+        concatDF.loc[missing, 'ASK'] = concatDF.loc[missing, 'CLOSE'] + (replacementSpread/10000)
 
     #Flag replaced values
-    replacedBidAskList = [''] * len(concatDF)
-    for idx in missingIDX:
-        replacedBidAskList[idx] = 'Replaced'
-
-    concatDF['ReplacedBidAsk'] = replacedBidAskList
+    concatDF['ReplacedBidAsk'] = np.where(missing, 'Replaced', '')
 
     concatDF = concatDF[[timeCol, 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'BID', 'ASK', 'ReplacedBidAsk']]
 
     return concatDF
 
 ##An example of running.
+if __name__ == "__main__":
 
-#Set up datafolders - this is just my style of doing things.
-ratesDatFolder = os.path.join(os.getcwd(), "ExampleDatasets", "OHLC_Only")
-ticksDatFolder = os.path.join(os.getcwd(), "ExampleDatasets", "TicksData")
-
-ratesFileName = "EURUSD.a_M1_202111010000_202204292356.csv"
-#Given the size of the ticks data and githubs 100mb limit, a small dataset is used as an example here.
-ticksFileName = "EURUSD.a_202201030101_202201312358.csv" 
+    #Set up datafolders - this is just my style of doing things.
+    ratesDatFolder = os.path.join(os.getcwd(), "ExampleDatasets", "OHLC_Only")
+    ticksDatFolder = os.path.join(os.getcwd(), "ExampleDatasets", "TicksData")
 
-ratesDir = os.path.join(ratesDatFolder, ratesFileName)
-ticksDir = os.path.join(ticksDatFolder, ticksFileName)
+    ratesFileName = "EURUSD.a_M1_202111010000_202204292356.csv"
+    #Given the size of the ticks data and githubs 100mb limit, a small dataset is used as an example here.
+    ticksFileName = "EURUSD.a_202201030101_202201312358.csv" 
 
-ratesDat = pd.read_csv(ratesDir, sep = "\t", parse_dates = [[0, 1]])
-ticksDat = pd.read_csv(ticksDir, sep = "\t", parse_dates = [[0, 1]])
+    ratesDir = os.path.join(ratesDatFolder, ratesFileName)
+    ticksDir = os.path.join(ticksDatFolder, ticksFileName)
 
-#This handles the naming of MT5 Data for input.
-for oldCol in ratesDat.columns:
-    ratesDat.rename(columns = {oldCol: oldCol.replace('<', '').replace('>', '').replace('_', '')}, inplace = True)
+    ratesDat = pd.read_csv(ratesDir, sep = "\t", parse_dates = [[0, 1]])
+    #Ticks are streamed in chunks and reduced to the first valid tick per bar, rather than read in full.
+    ticksDat = ticksToBars(ticksDir, '1T')
 
-for oldCol in ticksDat.columns:
-    ticksDat.rename(columns = {oldCol: oldCol.replace('<', '').replace('>', '').replace('_', '')}, inplace = True)
+    #This handles the naming of MT5 Data for input.
+    for oldCol in ratesDat.columns:
+        ratesDat.rename(columns = {oldCol: oldCol.replace('<', '').replace('>', '').replace('_', '')}, inplace = True)
 
-#Function Call
-EURUSDM1_dat = ratesTicksConcatenator(ratesDat, ticksDat, '1T')
+    #Function Call
+    EURUSDM1_dat = ratesTicksConcatenator(ratesDat, ticksDat, '1T')
 
-#Use dates for file naming
-startDate = EURUSDM1_dat.iloc[0, 0]
-endDate = EURUSDM1_dat.iloc[-1, 0]
+    #Use dates for file naming
+    startDate = EURUSDM1_dat.iloc[0, 0]
+    endDate = EURUSDM1_dat.iloc[-1, 0]
 
-#Set up export
-exportFolder = os.path.join(os.getcwd(), "ExampleDatasets", "ConcatExport")
-exportName = "EURUSD.a_M1_{}_{}.csv".format(startDate.strftime("%d%m%Y"), endDate.strftime("%d%m%Y")) 
-exportDir = os.path.join(exportFolder, exportName)
-EURUSDM1_dat.to_csv(exportDir, index = False)
\ No newline at end of file
+    #Set up export
+    exportFolder = os.path.join(os.getcwd(), "ExampleDatasets", "ConcatExport")
+    exportName = "EURUSD.a_M1_{}_{}.csv".format(startDate.strftime("%d%m%Y"), endDate.strftime("%d%m%Y")) 
+    exportDir = os.path.join(exportFolder, exportName)
+    EURUSDM1_dat.to_csv(exportDir, index = False)
\ No newline at end of file
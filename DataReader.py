@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+import csv
+import datetime
+
+#Number of bytes read to sniff the delimiter and columns, rather than parsing the whole file to do so.
+SNIFF_BYTES = 16384
+
+#Explicit formats tried (in order) for the time column(s), as seen in MT5 exports and Yahoo/FTSE files.
+#Anything else (e.g. times with utc offsets) falls back to pandas' own inference.
+TIME_FORMATS = ['%Y.%m.%d %H:%M:%S', '%Y.%m.%d %H:%M', '%Y.%m.%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', \
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y']
+
+#Price columns read directly as floats.
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'bidopen', 'bidhigh', 'bidlow', 'bidclose', 'askopen', 'askhigh', 'asklow', 'askclose', \
+    'bid', 'ask', 'last']
+
+#Recognised data frequencies - see inferFrequency().
+FREQUENCIES = {'D1': pd.Timedelta(1, 'D'),\
+    'H1': pd.Timedelta(1, 'H'),\
+        'M15': pd.Timedelta(15, 'm'),\
+            'M5': pd.Timedelta(5, 'm'),\
+                'M1': pd.Timedelta(1, 'm')}
+
+def normaliseColumnName(colName):
+    """
+    Column naming used across the backtester - lower case, without MT5's <> or underscores.
+    """
+
+    return colName.replace('<', '').replace('>', '').replace('_', '').lower()
+
+def sniffCsv(dataDir):
+    """
+    Establishes the delimiter, columns and time columns of a csv from the first SNIFF_BYTES only.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+
+    Returns:
+    delimiter (str): The column delimiter.
+    columns (list of str): Column names as per the header.
+    timeCols (list of str): Columns with 'date' or 'time' in the name - seen cases where there are multiple (e.g. "Date", "Time").
+    """
+
+    with open(dataDir, 'r', newline = '') as f:
+        sample = f.read(SNIFF_BYTES)
+
+    lines = sample.splitlines()
+    if len(lines) > 1 and not sample.endswith(('\n', '\r')):
+        #Drop the last (partial) line of the sample.
+        lines = lines[:-1]
+    if len(lines) == 0:
+        raise Exception ("Empty data file: {}".format(dataDir))
+
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lines), delimiters = ",\t;|").delimiter
+    except csv.Error:
+        #Single column files, or too little data to go on - fall back on the header alone.
+        delimiter = max(",\t;|", key = lines[0].count)
+
+    columns = next(csv.reader([lines[0]], delimiter = delimiter))
+    timeCols = [colName for colName in columns if 'date' in colName.lower() or 'time' in colName.lower()]
+
+    return delimiter, columns, timeCols
+
+def parseTimes(values):
+    """
+    Vectorised parse of a time column, using the first explicit TIME_FORMATS matching the first value.
+
+    Parameters:
+    values (pd.Series of str): The time strings.
+
+    Returns:
+    times (pd.Series): Parsed times - datetime64 where possible, otherwise datetime objects (e.g. for a mix of utc offsets).
+    """
+
+    first = str(values.iloc[0]).strip()
+    for timeFormat in TIME_FORMATS:
+        try:
+            datetime.datetime.strptime(first, timeFormat)
+        except ValueError:
+            continue
+        try:
+            return pd.to_datetime(values, format = timeFormat)
+        except ValueError:
+            break
+
+    offsets = values.str.strip().str.extract(r'([+-])(\d\d):?(\d\d)$')
+    if offsets[0].notna().all() and offsets.drop_duplicates().shape[0] > 1:
+        return parseMixedOffsets(values, offsets)
+
+    return pd.to_datetime(values)
+
+def parseMixedOffsets(values, offsets):
+    """
+    Parses times with a mix of utc offsets (e.g. Yahoo daily data over daylight savings), which pandas can only parse
+        one value at a time (or not at all in newer versions).
+    As previously, each time is kept as a datetime object with its own offset, rather than converted to a common timezone.
+
+    Parameters:
+    values (pd.Series of str): The time strings, each ending in a +HH:MM/-HH:MM offset.
+    offsets (pd.DataFrame): The sign, hours and minutes of each offset.
+
+    Returns:
+    times (pd.Series of datetime.datetime): Parsed times.
+    """
+
+    offsetMinutes = (offsets[1].astype(int) * 60 + offsets[2].astype(int)) * np.where(offsets[0] == '-', -1, 1)
+    utcTimes = pd.to_datetime(values, utc = True)
+    localTimes = (utcTimes.dt.tz_localize(None) + pd.to_timedelta(offsetMinutes, unit = 'm')).dt.to_pydatetime()
+
+    timezones = {minutes: datetime.timezone(datetime.timedelta(minutes = int(minutes))) for minutes in np.unique(offsetMinutes)}
+    return pd.Series([localTime.replace(tzinfo = timezones[minutes]) for localTime, minutes in zip(localTimes, offsetMinutes)], \
+        index = values.index, dtype = object)
+
+def readCsv(dataDir):
+    """
+    Single pass read of an MT5 export or Yahoo style csv, with the C parser.
+    The delimiter and time columns are sniffed from a small sample, prices are read directly as floats
+        and separate date/time columns (e.g. MT5's <DATE> and <TIME>) are merged into a single time column placed first.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+
+    Returns:
+    fullData (pd.DataFrame): The data with normalised (lower case) column names. Time columns are parsed, but not yet renamed.
+    """
+
+    delimiter, columns, timeCols = sniffCsv(dataDir)
+
+    #round_trip keeps floats identical to the python parser (and Python's float()) previously used.
+    fullData = pd.read_csv(dataDir, sep = delimiter, engine = 'c', dtype = getDtypes(columns, timeCols), float_precision = 'round_trip')
+
+    return normaliseFrame(fullData, timeCols)
+
+def readCsvChunks(dataDir, chunkSize):
+    """
+    As per readCsv, but reading the file in chunks of rows such that only one chunk is held in memory at a time.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file.
+    chunkSize (int): Number of rows per chunk.
+
+    Returns:
+    chunks (generator of pd.DataFrame): The normalised chunks, in order. The time column is named 'time'.
+    """
+
+    delimiter, columns, timeCols = sniffCsv(dataDir)
+
+    reader = pd.read_csv(dataDir, sep = delimiter, engine = 'c', dtype = getDtypes(columns, timeCols), float_precision = 'round_trip', \
+        chunksize = chunkSize)
+    for chunk in reader:
+        chunk = normaliseFrame(chunk.reset_index(drop = True), timeCols)
+        chunk.rename(columns = {chunk.columns[0]: 'time'}, inplace = True)
+        yield chunk
+
+def getDtypes(columns, timeCols):
+    #Prices read directly as floats, times as strings to be parsed in one go by parseTimes.
+    dtypes = {colName: np.float64 for colName in columns if normaliseColumnName(colName) in PRICE_COLUMNS}
+    dtypes.update({colName: str for colName in timeCols})
+    return dtypes
+
+def normaliseFrame(fullData, timeCols):
+    """
+    Parses the time column(s) and normalises the column names of freshly read data.
+
+    Parameters:
+    fullData (pd.DataFrame): The data as read.
+    timeCols (list of str): The time column(s), as per sniffCsv.
+
+    Returns:
+    fullData (pd.DataFrame): The data with normalised (lower case) column names and parsed times.
+    """
+
+    if len(timeCols) > 1:
+        #Merge into one column, placed first, as pandas' parse_dates = [[...]] did.
+        merged = fullData[timeCols[0]].str.strip()
+        for colName in timeCols[1:]:
+            merged = merged + ' ' + fullData[colName].str.strip()
+        fullData = fullData.drop(columns = timeCols)
+        fullData.insert(0, "_".join(timeCols), parseTimes(merged))
+    elif len(timeCols) == 1:
+        fullData[timeCols[0]] = parseTimes(fullData[timeCols[0]])
+
+    fullData.columns = [normaliseColumnName(colName) for colName in fullData.columns]
+
+    return fullData
+
+def inferFrequency(times):
+    """
+    Infers the data frequency by taking the minimum difference of the first five points.
+
+    Parameters:
+    times (pd.Series): The parsed time column.
+
+    Returns:
+    frequencyStr (str): The frequency, e.g. 'D1'.
+    """
+
+    frequency = min(times.diff(1)[1:6])
+    frequencyDict = {timedelta: frequencyStr for frequencyStr, timedelta in FREQUENCIES.items()}
+
+    if frequency in frequencyDict.keys():
+        return frequencyDict[frequency]
+    else:
+        raise Exception ("Unrecognised Frequency - please add to dictionary above or review any missing/inconsistent data.")
@@ -0,0 +1,288 @@
+import numpy as np
+
+#Optional - if numba is installed the execution loop is compiled, otherwise it runs as a plain Python loop over lists.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+#Action codes used by the kernel. The index in ACTIONS is the code stored, -1 meaning no action recorded (e.g. warm up rows).
+ACTIONS = ['hold', 'buy', 'short', 'close long', 'close short', 'update Limits']
+HOLD, BUY, SHORT, CLOSE_LONG, CLOSE_SHORT, UPDATE_LIMITS = range(len(ACTIONS))
+
+#Reasons a trade is closed, recorded at the closing index (0 elsewhere) - see signalHandler.getLedger().
+EXIT_REASONS = ['', 'take profit', 'stop loss', 'reversal']
+NO_EXIT, TAKE_PROFIT, STOP_LOSS, REVERSAL = range(len(EXIT_REASONS))
+
+def initialState():
+    """
+    The broker state at the start of a backtest - flat, no trades and zero profit.
+    The state is returned by executeSignals such that a backtest can be continued over a following range of data.
+
+    Returns:
+    state (tuple): (position, entry price, stop loss price, take profit price, entry brokerage cost, total profit,
+        trades total, trades won, trades lost, trades tied)
+    """
+
+    return (0, np.nan, 0.0, 0.0, np.nan, 0.0, 0, 0, 0, 0)
+
+def _executeLoop(signals, opens, highs, lows, closes, start, stop, stopLoss, takeProfit, guaranteedSl, brokerCost, percentageLimits, \
+    dynamicLimits, holdDirection, state, actionOut, positionOut, reasonOut, plOut, costOut, totalOut, executedOut, slOut, tpOut):
+    """
+    The position state machine of signalHandler.buy/sell/checkStopConditions/updateLimits/closeTrade, as a single loop.
+    Arithmetic follows signalHandler line for line so results are identical.
+    Written to run either as plain Python (lists) or compiled by numba (arrays).
+    """
+
+    position, entryPrice, slPx, tpPx, prevCost, totalProfit, tradesTotal, tradesWon, tradesLost, tradesTied = state
+
+    for i in range(start, stop):
+        signal = signals[i]
+        openPriceT1 = opens[i + 1]
+        highPrice = highs[i]
+        lowPrice = lows[i]
+        closePrice = closes[i]
+
+        check = False
+        update = False
+        closePL = 0.0
+        exitPrice = 0.0
+        close = False
+        reason = NO_EXIT
+
+        if signal == 1 or signal == -1:
+            if position == 0:
+                #Open a trade at open t+1
+                if percentageLimits:
+                    cost = openPriceT1 * brokerCost
+                else:
+                    cost = brokerCost
+                position = signal
+                entryPrice = openPriceT1
+
+                if signal == 1:
+                    if percentageLimits:
+                        slPx = entryPrice * (1 + stopLoss)
+                        tpPx = entryPrice * (1 + takeProfit)
+                    else:
+                        slPx = entryPrice + stopLoss
+                        tpPx = entryPrice + takeProfit
+                    actionOut[i] = BUY
+                else:
+                    if percentageLimits:
+                        slPx = entryPrice * (1 - stopLoss)
+                        tpPx = entryPrice * (1 - takeProfit)
+                    else:
+                        slPx = entryPrice - stopLoss
+                        tpPx = entryPrice - takeProfit
+                    actionOut[i] = SHORT
+
+                slOut[i] = slPx
+                tpOut[i] = tpPx
+                plOut[i] = 0.0
+                totalOut[i] = totalProfit
+                positionOut[i] = position
+                executedOut[i] = openPriceT1
+                costOut[i] = cost
+                prevCost = cost
+                continue
+
+            elif position == signal:
+                #Receiving a stronger signal in the same direction
+                if dynamicLimits:
+                    update = True
+                else:
+                    check = True
+
+            else:
+                #Opposing signal
+                if holdDirection:
+                    check = True
+                else:
+                    closePL = position * (openPriceT1 - entryPrice)
+                    exitPrice = openPriceT1
+                    close = True
+                    reason = REVERSAL
+
+        elif signal == 0:
+            check = True
+
+        else:
+            raise Exception ("Unknown Signal!")
+
+        PL = 0.0
+        if update:
+            PL = position * (closePrice - entryPrice)
+            resetFlag = False
+            if position == 1:
+                if lowPrice >= slPx and PL > 0:
+                    resetFlag = True
+                    if percentageLimits:
+                        slPx = closePrice * (1 + stopLoss)
+                        tpPx = closePrice * (1 + takeProfit)
+                    else:
+                        slPx = closePrice + stopLoss
+                        tpPx = closePrice + takeProfit
+            elif position == -1:
+                if highPrice <= slPx and PL > 0:
+                    resetFlag = True
+                    if percentageLimits:
+                        slPx = closePrice * (1 - stopLoss)
+                        tpPx = closePrice * (1 - takeProfit)
+                    else:
+                        slPx = closePrice - stopLoss
+                        tpPx = closePrice - takeProfit
+
+            if resetFlag:
+                slOut[i] = slPx
+                tpOut[i] = tpPx
+                actionOut[i] = UPDATE_LIMITS
+                plOut[i] = PL
+                totalOut[i] = totalProfit
+                positionOut[i] = position
+                continue
+            check = True
+
+        if check:
+            PL = 0.0
+            actionOut[i] = HOLD
+            if position == -1:
+                PL = position * (closePrice - entryPrice)
+                if lowPrice <= tpPx:
+                    closePL = entryPrice - lowPrice
+                    exitPrice = lowPrice
+                    close = True
+                    reason = TAKE_PROFIT
+                elif highPrice >= slPx:
+                    closePL = entryPrice - highPrice
+                    exitPrice = highPrice
+                    close = True
+                    reason = STOP_LOSS
+            elif position == 1:
+                PL = position * (closePrice - entryPrice)
+                if highPrice >= tpPx:
+                    closePL = highPrice - entryPrice
+                    exitPrice = highPrice
+                    close = True
+                    reason = TAKE_PROFIT
+                elif lowPrice <= slPx:
+                    closePL = lowPrice - entryPrice
+                    exitPrice = lowPrice
+                    close = True
+                    reason = STOP_LOSS
+
+        if close:
+            #closeTrade/bandPL
+            PL = closePL
+            tradesTotal += 1
+            if percentageLimits:
+                cost = brokerCost * exitPrice
+            else:
+                cost = brokerCost
+            totalBrokerage = cost + prevCost
+
+            netPL = PL
+            if guaranteedSl:
+                if netPL > takeProfit:
+                    netPL = takeProfit
+                elif netPL < stopLoss:
+                    netPL = stopLoss
+            netPL -= totalBrokerage
+
+            if position == -1:
+                actionOut[i] = CLOSE_SHORT
+            else:
+                actionOut[i] = CLOSE_LONG
+            executedOut[i] = exitPrice
+            costOut[i] = cost
+            reasonOut[i] = reason
+            totalProfit += netPL
+
+            position = 0
+            entryPrice = np.nan
+            tpPx = 0.0
+            slPx = 0.0
+
+            roundedPL = round(netPL, 5)
+            if roundedPL > 0:
+                tradesWon += 1
+            elif roundedPL < 0:
+                tradesLost += 1
+            elif roundedPL == 0:
+                tradesTied += 1
+
+            prevCost = np.nan
+
+        plOut[i] = PL
+        totalOut[i] = totalProfit
+        positionOut[i] = position
+
+    return (position, entryPrice, slPx, tpPx, prevCost, totalProfit, tradesTotal, tradesWon, tradesLost, tradesTied)
+
+_executeLoopCompiled = njit(cache = True)(_executeLoop) if njit is not None else None
+
+def executeSignals(signals, openPrices, highPrices, lowPrices, closePrices, stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, \
+    dynamicLimits, holdDirection, start = 0, stop = None, state = None):
+    """
+    Array based alternative to stepping signalHandler bar by bar. Runs the whole position state machine in one pass.
+    Signals at index i are executed at open price i+1, as per the backtest loop.
+
+    Parameters:
+    signals (array-like of int): Strategy signals (1, 0, -1), aligned to the price arrays.
+    openPrices, highPrices, lowPrices, closePrices (array-like of float): Price arrays.
+    stopLoss, takeProfit, guaranteedSl, brokerCost, limitType, dynamicLimits, holdDirection: As per signalHandler.
+    start (int): First index to execute - generally inputRowSize - 1.
+    stop (int = None): Index to stop at (exclusive). Defaults to len(openPrices) - 1, as the last row is only used for open t+1.
+    state (tuple = None): Broker state to continue from, as returned by a previous call. Defaults to initialState().
+
+    Returns:
+    results (dict): Typed output arrays over [0, stop) - 'action' (int8 codes of ACTIONS, -1 where not executed), 'position' (int8),
+        'Exit reason' (int8 codes of EXIT_REASONS),
+        'Trade P/L', 'Brokerage Cost', 'Total profit', 'Executed price', 'Stop Loss', 'Take Profit' (float64, nan where not set)
+        as well as the final 'state' to continue from.
+    """
+
+    if limitType == 'Percentage':
+        percentageLimits = True
+    elif limitType == 'Flat':
+        percentageLimits = False
+    else:
+        raise Exception ("Unknown limit type - please use 'Flat' or 'Percentage'.")
+
+    if stop is None:
+        stop = len(openPrices) - 1
+    if state is None:
+        state = initialState()
+
+    signals = np.asarray(signals, dtype = np.int64)
+    openPrices = np.asarray(openPrices, dtype = np.float64)
+    highPrices = np.asarray(highPrices, dtype = np.float64)
+    lowPrices = np.asarray(lowPrices, dtype = np.float64)
+    closePrices = np.asarray(closePrices, dtype = np.float64)
+
+    args = (start, stop, float(stopLoss), float(takeProfit), bool(guaranteedSl), float(brokerCost), percentageLimits, \
+        bool(dynamicLimits), bool(holdDirection), state)
+
+    if _executeLoopCompiled is not None:
+        action = np.full(stop, -1, dtype = np.int8)
+        position = np.zeros(stop, dtype = np.int8)
+        reason = np.zeros(stop, dtype = np.int8)
+        floatOuts = [np.full(stop, np.nan) for i in range(6)]
+        state = _executeLoopCompiled(signals, openPrices, highPrices, lowPrices, closePrices, *args, action, position, reason, *floatOuts)
+    else:
+        #Python floats/lists are considerably quicker to step through than numpy scalars.
+        action = [-1] * stop
+        position = [0] * stop
+        reason = [0] * stop
+        floatOuts = [[np.nan] * stop for i in range(6)]
+        state = _executeLoop(signals.tolist(), openPrices.tolist(), highPrices.tolist(), lowPrices.tolist(), closePrices.tolist(), \
+            *args, action, position, reason, *floatOuts)
+        action = np.array(action, dtype = np.int8)
+        position = np.array(position, dtype = np.int8)
+        reason = np.array(reason, dtype = np.int8)
+        floatOuts = [np.array(out, dtype = np.float64) for out in floatOuts]
+
+    pl, cost, total, executed, sl, tp = floatOuts
+
+    return {'action': action, 'position': position, 'Exit reason': reason, 'Trade P/L': pl, 'Brokerage Cost': cost, 'Total profit': total, \
+        'Executed price': executed, 'Stop Loss': sl, 'Take Profit': tp, 'state': state}
@@ -0,0 +1,272 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+
+from DataReader import readCsv, inferFrequency
+
+#Store layout - a folder holding a small json header and one contiguous binary array per field (int64 time, then e.g. float64 OHLC).
+HEADER_FILENAME = 'header.json'
+STORE_VERSION = 1
+
+def isStore(dataDir):
+    """
+    Parameters:
+    dataDir (str or OHLCStore): Directory of a data file or store, or an already opened store (e.g. a Panel.PanelAsset).
+
+    Returns:
+    isStore (bool): Whether the directory is an OHLCStore folder.
+    """
+
+    if isinstance(dataDir, OHLCStore):
+        return True
+    return os.path.isdir(dataDir) and os.path.exists(os.path.join(dataDir, HEADER_FILENAME))
+
+def openStore(dataDir):
+    """
+    Parameters:
+    dataDir (str or OHLCStore): Directory of a store, or an already opened store.
+
+    Returns:
+    store (OHLCStore): The opened store.
+    """
+
+    if isinstance(dataDir, OHLCStore):
+        return dataDir
+    return OHLCStore(dataDir)
+
+def toStoreTimes(times):
+    """
+    Converts a parsed time column to int64 nanoseconds - in UTC along with the timezone for timezone aware times, otherwise as is.
+        Times with a mix of utc offsets (e.g. Yahoo daily data) are converted to their local (wall clock) time, such that dates are unchanged.
+
+    Parameters:
+    times (pd.Series): The time column, as per BacktestRunner.readData.
+
+    Returns:
+    times (np.ndarray of int64): The times in nanoseconds.
+    tz (str or None): The timezone, where times are UTC.
+    """
+
+    tz = None
+    if pd.api.types.is_datetime64_any_dtype(times.dtype):
+        if getattr(times.dt, 'tz', None) is not None:
+            tz = str(times.dt.tz)
+            try:
+                pd.Timestamp(0, tz = tz)
+                times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+            except Exception:
+                #Timezones which can't be rebuilt from their name - keep the wall clock time.
+                tz = None
+                times = times.dt.tz_localize(None)
+    else:
+        times = pd.to_datetime(times.map(lambda time: time.replace(tzinfo = None)))
+
+    return times.values.astype('datetime64[ns]').astype(np.int64), tz
+
+def writeStore(storeDir, fullData, asset, frequencyStr):
+    """
+    Writes a dataframe to an OHLCStore folder.
+    Times are stored as int64 nanoseconds, as per toStoreTimes().
+    Only numeric columns are stored.
+
+    Parameters:
+    storeDir (str): Folder to write the store to. Created if it doesn't exist.
+    fullData (pd.DataFrame): Data with a 'time' column, as per BacktestRunner.readData.
+    asset (str): Asset name, e.g. 'EURUSD'.
+    frequencyStr (str): Data frequency, e.g. 'M1'.
+    """
+
+    os.makedirs(storeDir, exist_ok = True)
+
+    times, tz = toStoreTimes(fullData['time'])
+    columns = [['time', 'int64']]
+    times.tofile(os.path.join(storeDir, 'time.bin'))
+
+    for column in fullData.columns:
+        if column == 'time':
+            continue
+        values = fullData[column].values
+        if not isinstance(values, np.ndarray) or values.dtype.kind not in 'iufb':
+            print("OHLCStore - skipping non numeric column '{}'".format(column))
+            continue
+        values = np.ascontiguousarray(values)
+        columns.append([column, values.dtype.str])
+        values.tofile(os.path.join(storeDir, '{}.bin'.format(column)))
+
+    header = {'version': STORE_VERSION, 'asset': asset, 'frequencyStr': frequencyStr, 'length': len(fullData), 'tz': tz, 'columns': columns}
+    with open(os.path.join(storeDir, HEADER_FILENAME), 'w') as f:
+        json.dump(header, f, indent = 4)
+
+def csvToStore(dataDir, storeDir = None):
+    """
+    Converts a csv data file (MT5 export or Yahoo style, as per BacktestRunner.prepData) to an OHLCStore folder.
+
+    Parameters:
+    dataDir (str): The directory of the input csv file. The asset is taken from the filename, as per BacktestRunner.prepData.
+    storeDir (str = None): Folder to write the store to. Defaults to the csv directory with the extension replaced by '.ohlc'.
+
+    Returns:
+    storeDir (str): The store folder.
+    """
+
+    if storeDir is None:
+        storeDir = os.path.splitext(dataDir)[0] + '.ohlc'
+
+    fullData = readCsv(dataDir)
+    fullData.rename(columns = {fullData.columns[0]: 'time'}, inplace = True)
+    asset = os.path.basename(dataDir).split("_")[0]
+
+    writeStore(storeDir, fullData, asset, inferFrequency(fullData['time']))
+    return storeDir
+
+class OHLCStore:
+    """
+    Class for reading an OHLCStore folder, with each field opened as a read-only memory map.
+    Only the rows read (e.g. a date window found by binary search on the time array) are paged in from disk.
+    """
+
+    def __init__(self, storeDir):
+        """
+        Parameters:
+        storeDir (str): The store folder, as written by writeStore()/csvToStore().
+        """
+
+        if not isStore(storeDir):
+            raise Exception ("No OHLCStore found at {}".format(storeDir))
+
+        with open(os.path.join(storeDir, HEADER_FILENAME), 'r') as f:
+            header = json.load(f)
+
+        self.storeDir = storeDir
+        self.asset = header['asset']
+        self.frequencyStr = header['frequencyStr']
+        self.length = header['length']
+        self.tz = header['tz']
+        self.columns = [column for column, dtype in header['columns']]
+        self.arrays = {}
+        for column, dtype in header['columns']:
+            if self.length == 0:
+                self.arrays[column] = np.zeros(0, dtype = dtype)
+            else:
+                self.arrays[column] = np.memmap(os.path.join(storeDir, '{}.bin'.format(column)), dtype = dtype, mode = 'r', shape = (self.length,))
+
+    def __len__(self):
+        return self.length
+
+    def toStoreTime(self, date):
+        """
+        Parameters:
+        date (datetime): A date, e.g. the backtest start date.
+
+        Returns:
+        time (int): The date as stored in the time array (int64 nanoseconds).
+        """
+
+        date = pd.Timestamp(date)
+        if self.tz is not None:
+            date = date.tz_localize(self.tz) if date.tz is None else date
+            date = date.tz_convert('UTC').tz_localize(None)
+        elif date.tz is not None:
+            date = date.tz_localize(None)
+        return date.value
+
+    def getTime(self, index):
+        """
+        Parameters:
+        index (int): Row index.
+
+        Returns:
+        time (pd.Timestamp): The time of the row.
+        """
+
+        time = pd.Timestamp(int(self.arrays['time'][index]))
+        if self.tz is not None:
+            time = time.tz_localize('UTC').tz_convert(self.tz)
+        return time
+
+    def searchTime(self, date, side = 'left'):
+        """
+        Binary search of the time array - only the handful of pages visited are read from disk.
+
+        Parameters:
+        date (datetime): The date to search for.
+        side (str): As per np.searchsorted - 'left' gives the first row at/after date, 'right' the first row after date.
+
+        Returns:
+        index (int): The insertion index of date.
+        """
+
+        return int(np.searchsorted(self.arrays['time'], self.toStoreTime(date), side = side))
+
+    def read(self, start = 0, stop = None):
+        """
+        Reads a range of rows into memory.
+
+        Parameters:
+        start (int): First row.
+        stop (int = None): Last row (exclusive). Defaults to the end of the store.
+
+        Returns:
+        data (pd.DataFrame): The rows, with the time column parsed.
+        """
+
+        if stop is None:
+            stop = self.length
+
+        data = {}
+        for column in self.columns:
+            values = np.array(self.arrays[column][start:stop])
+            if column == 'time':
+                values = pd.to_datetime(values)
+                if self.tz is not None:
+                    values = values.tz_localize('UTC').tz_convert(self.tz)
+            data[column] = values
+
+        return pd.DataFrame(data)
+
+class FrameStore(OHLCStore):
+    """
+    An already loaded dataframe with the OHLCStore interface, such that date windows of it are found by binary search (see BacktestRunner.locateStoreWindow)
+        rather than by boolean masks over the whole time column.
+    Built once per dataframe (e.g. walk forward style use, trimming the same data many times), following reads are views rather than copies.
+    """
+
+    def __init__(self, fullData, asset = None, frequencyStr = None):
+        """
+        Parameters:
+        fullData (pd.DataFrame): Data with a 'time' column in time order, as per BacktestRunner.readData.
+        asset (str = None), frequencyStr (str = None): As per OHLCStore.
+        """
+
+        times = fullData['time']
+        if pd.api.types.is_datetime64_any_dtype(times.dtype):
+            searchTimes, self.tz = toStoreTimes(times)
+        else:
+            #Times with a mix of utc offsets are compared as instants, as datetime objects are.
+            searchTimes, self.tz = pd.to_datetime(times, utc = True).dt.tz_localize(None).values.astype('datetime64[ns]').astype(np.int64), 'UTC'
+
+        self.storeDir = None
+        self.data = fullData
+        self.asset = asset
+        self.frequencyStr = frequencyStr
+        self.length = len(fullData)
+        self.columns = list(fullData.columns)
+        self.arrays = {'time': searchTimes}
+
+    def getTime(self, index):
+        return self.data['time'].iloc[index]
+
+    def read(self, start = 0, stop = None):
+        """
+        Parameters:
+        start (int): First row.
+        stop (int = None): Last row (exclusive). Defaults to the end of the data.
+
+        Returns:
+        data (pd.DataFrame): A view of the rows, re-indexed from 0.
+        """
+
+        data = self.data.iloc[start:stop]
+        data.index = pd.RangeIndex(len(data))
+        return data
@@ -0,0 +1,325 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+
+from BacktestRunner import BacktestRunner
+from DataCache import DEFAULT_CACHE_DIR, fileKey
+from OHLCStore import OHLCStore, toStoreTimes
+
+#Panel cache layout - a folder holding a json header, the common time axis, the (asset, time, field) values and the (asset, time) validity mask.
+HEADER_FILENAME = 'panel.json'
+PANEL_VERSION = 1
+
+def getPanelDir(dataFiles, fields = None, cacheDir = None):
+    """
+    Parameters:
+    dataFiles (list of str): Directories of the input csv files.
+    fields (list of str = None): The fields held, as per loadPanel().
+    cacheDir (str = None): Cache folder. Defaults to DataCache.DEFAULT_CACHE_DIR.
+
+    Returns:
+    panelDir (str): The cache folder for this list of files and fields.
+    """
+
+    if cacheDir is None:
+        cacheDir = DEFAULT_CACHE_DIR
+
+    panelId = json.dumps([[os.path.abspath(dataDir) for dataDir in dataFiles], fields])
+    return os.path.join(cacheDir, "Panel_{}_{}".format(len(dataFiles), hashlib.sha1(panelId.encode('utf-8')).hexdigest()[:16]))
+
+def loadPanel(dataFiles, fields = None, useCache = 1, cacheDir = None):
+    """
+    Loads a set of data files (e.g. the FTSE constituents in ExampleDatasets) into a single Panel, aligned on a common time axis.
+    The panel is cached, and following calls on unchanged files open it as read-only memory maps rather than re-reading and re-aligning every file.
+
+    Parameters:
+    dataFiles (list of str): Directories of the input csv files, as per BacktestRunner.prepData. All must have the same frequency and timezone.
+    fields (list of str = None): Columns to hold, e.g. ['open', 'high', 'low', 'close']. Defaults to the numeric columns common to every file.
+    useCache (int/Bool): A flag whether to read/write the panel cache (and each file's DataCache entry).
+    cacheDir (str = None): Cache folder. Defaults to DataCache.DEFAULT_CACHE_DIR.
+
+    Returns:
+    panel (Panel): The aligned panel.
+    """
+
+    if len(dataFiles) == 0:
+        raise Exception ("No data files passed to loadPanel")
+
+    panelDir = getPanelDir(dataFiles, fields, cacheDir)
+    keys = [fileKey(dataDir) for dataDir in dataFiles]
+
+    if useCache and os.path.exists(os.path.join(panelDir, HEADER_FILENAME)):
+        try:
+            panel = openPanel(panelDir)
+            if panel.keys == keys:
+                return panel
+        except Exception as e:
+            #Unreadable/partially written panels are simply rebuilt.
+            print("Ignoring unreadable panel cache {}: {}".format(panelDir, e))
+
+    panel = buildPanel(dataFiles, fields, useCache, cacheDir)
+    panel.keys = keys
+
+    if useCache:
+        panel.save(panelDir)
+        return openPanel(panelDir)
+
+    return panel
+
+def buildPanel(dataFiles, fields = None, useCache = 1, cacheDir = None):
+    """
+    Reads and aligns a set of data files - see loadPanel(), which should generally be used instead as it caches the result.
+
+    Returns:
+    panel (Panel): The aligned panel, held in memory.
+    """
+
+    assets = []
+    frames = []
+    frequencyStr = None
+    for dataDir in dataFiles:
+        #Read as per a backtest, such that asset naming, parsing and the DataCache are all shared.
+        loader = BacktestRunner(None, None, 1, None, None)
+        loader.prepData(dataDir, 0, useCache, cacheDir)
+
+        if loader.asset in assets:
+            raise Exception ("Duplicate asset {} in panel files - {}".format(loader.asset, dataDir))
+        if frequencyStr is not None and loader.frequencyStr != frequencyStr:
+            raise Exception ("Panel files must share a frequency - {} is {} vs {}".format(dataDir, loader.frequencyStr, frequencyStr))
+
+        assets.append(loader.asset)
+        frames.append(loader.data)
+        frequencyStr = loader.frequencyStr
+
+    if fields is None:
+        fields = [column for column in frames[0].columns if column != 'time' and \
+            all(column in data.columns and pd.api.types.is_numeric_dtype(data[column].dtype) for data in frames)]
+
+    assetTimes = []
+    tz = None
+    for asset, data in zip(assets, frames):
+        missing = [field for field in fields if field not in data.columns]
+        if len(missing) > 0:
+            raise Exception ("Panel fields {} not found for {}".format(missing, asset))
+
+        times, assetTz = toStoreTimes(data['time'])
+        if len(assetTimes) > 0 and assetTz != tz:
+            raise Exception ("Panel files must share a timezone - {} is {} vs {}".format(asset, assetTz, tz))
+        assetTimes.append(times)
+        tz = assetTz
+
+    #Common axis - every time seen in any of the files. Assets without a row at a time are masked out (valid = False) and hold NaN.
+    times = np.unique(np.concatenate(assetTimes))
+    values = np.full((len(assets), len(times), len(fields)), np.nan)
+    valid = np.zeros((len(assets), len(times)), dtype = bool)
+    for i, (data, assetTime) in enumerate(zip(frames, assetTimes)):
+        rows = np.searchsorted(times, assetTime)
+        values[i, rows, :] = data[fields].to_numpy(dtype = np.float64)
+        valid[i, rows] = True
+
+    return Panel(assets, fields, times, tz, frequencyStr, values, valid)
+
+def openPanel(panelDir):
+    """
+    Parameters:
+    panelDir (str): A panel cache folder, as written by Panel.save().
+
+    Returns:
+    panel (Panel): The panel, with each array opened as a read-only memory map.
+    """
+
+    with open(os.path.join(panelDir, HEADER_FILENAME), 'r') as f:
+        header = json.load(f)
+    if header['version'] != PANEL_VERSION:
+        raise Exception ("Panel cache version {} - expected {}".format(header['version'], PANEL_VERSION))
+
+    assetCount, timeCount, fieldCount = header['shape']
+    openArray = lambda name, dtype, shape: np.memmap(os.path.join(panelDir, name), dtype = dtype, mode = 'r', shape = shape) \
+        if np.prod(shape) > 0 else np.zeros(shape, dtype = dtype)
+
+    panel = Panel(header['assets'], header['fields'], openArray('time.bin', np.int64, (timeCount,)), header['tz'], header['frequencyStr'], \
+        openArray('values.bin', np.float64, (assetCount, timeCount, fieldCount)), openArray('valid.bin', bool, (assetCount, timeCount)), panelDir)
+    panel.keys = header['keys']
+    return panel
+
+def openPanelAsset(panelDir, asset):
+    #Used when sending a PanelAsset to a worker process - the worker re-opens the memory maps rather than receiving a copy of the data.
+    return openPanel(panelDir).getAsset(asset)
+
+class Panel:
+    """
+    Class holding many assets aligned on a common time axis, as contiguous arrays:
+        values - (asset, time, field) floats, NaN where an asset has no data.
+        valid - (asset, time) bools, whether an asset has a row at that time.
+    Use .getField() for cross-sectional analytics, and .getAsset() to backtest a single asset (e.g. BacktestRunner.prepData, BatchRunner.runBatch).
+    """
+
+    def __init__(self, assets, fields, times, tz, frequencyStr, values, valid, panelDir = None):
+        """
+        Parameters:
+        assets (list of str): Asset names, in the order of the first axis.
+        fields (list of str): Field names, in the order of the last axis.
+        times (np.ndarray of int64): The common time axis in nanoseconds, as per OHLCStore.toStoreTimes().
+        tz (str or None): The timezone, where times are UTC.
+        frequencyStr (str): Data frequency, e.g. 'D1'.
+        values (np.ndarray): (asset, time, field) values.
+        valid (np.ndarray): (asset, time) validity mask.
+        panelDir (str = None): The cache folder the arrays are mapped from, if any.
+        """
+
+        self.assets = list(assets)
+        self.fields = list(fields)
+        self.times = times
+        self.tz = tz
+        self.frequencyStr = frequencyStr
+        self.values = values
+        self.valid = valid
+        self.panelDir = panelDir
+        self.keys = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def __reduce_ex__(self, protocol):
+        #Cached panels are re-opened from disk when pickled (e.g. sent to worker processes), rather than copied.
+        if self.panelDir is not None:
+            return (openPanel, (self.panelDir,))
+        return super().__reduce_ex__(protocol)
+
+    def getTimes(self):
+        """
+        Returns:
+        times (pd.DatetimeIndex): The common time axis.
+        """
+
+        times = pd.to_datetime(self.times)
+        if self.tz is not None:
+            times = times.tz_localize('UTC').tz_convert(self.tz)
+        return times
+
+    def getField(self, field):
+        """
+        Parameters:
+        field (str): Field name, e.g. 'close'.
+
+        Returns:
+        values (np.ndarray): (asset, time) view of the field - NaN where an asset has no data.
+        """
+
+        return self.values[:, :, self.fields.index(field)]
+
+    def getAsset(self, asset):
+        """
+        Parameters:
+        asset (str): Asset name, e.g. 'AAL.L.csv' for ExampleDatasets/AAL.L.csv (as per BacktestRunner.prepData naming).
+
+        Returns:
+        assetView (PanelAsset): The asset's rows, which can be passed to BacktestRunner.prepData in place of a data file.
+        """
+
+        if asset not in self.assets:
+            raise Exception ("Asset {} not in panel - available assets: {}".format(asset, self.assets))
+        return PanelAsset(self, asset)
+
+    def save(self, panelDir):
+        """
+        Writes the panel to a cache folder, readable with openPanel().
+        Written to a temporary folder first, so parallel runs never read a partially written panel.
+
+        Parameters:
+        panelDir (str): The folder to write to - replaced if it exists.
+        """
+
+        parentDir = os.path.dirname(os.path.abspath(panelDir))
+        os.makedirs(parentDir, exist_ok = True)
+        tempDir = tempfile.mkdtemp(dir = parentDir, suffix = '.tmp')
+
+        try:
+            np.ascontiguousarray(self.times, dtype = np.int64).tofile(os.path.join(tempDir, 'time.bin'))
+            np.ascontiguousarray(self.values, dtype = np.float64).tofile(os.path.join(tempDir, 'values.bin'))
+            np.ascontiguousarray(self.valid, dtype = bool).tofile(os.path.join(tempDir, 'valid.bin'))
+
+            header = {'version': PANEL_VERSION, 'keys': self.keys, 'assets': self.assets, 'fields': self.fields, 'tz': self.tz, \
+                'frequencyStr': self.frequencyStr, 'shape': list(self.values.shape)}
+            with open(os.path.join(tempDir, HEADER_FILENAME), 'w') as f:
+                json.dump(header, f, indent = 4)
+
+            if os.path.exists(panelDir):
+                shutil.rmtree(panelDir)
+            os.replace(tempDir, panelDir)
+        except Exception:
+            shutil.rmtree(tempDir, ignore_errors = True)
+            raise
+
+        self.panelDir = panelDir
+
+class PanelAsset(OHLCStore):
+    """
+    A single asset of a Panel, with the same interface as an OHLCStore - so it can be passed to BacktestRunner.prepData in place of a data file.
+    Rows are the asset's valid rows only. Where those are contiguous on the common axis (no gaps, as is usual within one market)
+        the data read is a view of the panel's arrays rather than a copy.
+    """
+
+    def __init__(self, panel, asset):
+        """
+        Parameters:
+        panel (Panel): The panel.
+        asset (str): Asset name.
+        """
+
+        self.panel = panel
+        self.storeDir = panel.panelDir
+        self.asset = asset
+        self.frequencyStr = panel.frequencyStr
+        self.tz = panel.tz
+        self.fields = panel.fields
+        self.columns = ['time'] + panel.fields
+
+        index = panel.assets.index(asset)
+        rows = np.flatnonzero(panel.valid[index])
+        if len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows):
+            self.block = panel.values[index, rows[0]:rows[-1] + 1]
+            times = panel.times[rows[0]:rows[-1] + 1]
+        else:
+            self.block = panel.values[index, rows]
+            times = panel.times[rows]
+
+        self.length = len(times)
+        self.arrays = {'time': times}
+        self.arrays.update({field: self.block[:, i] for i, field in enumerate(self.fields)})
+
+    def __repr__(self):
+        return "PanelAsset({})".format(self.asset)
+
+    def __reduce__(self):
+        if self.panel.panelDir is not None:
+            return (openPanelAsset, (self.panel.panelDir, self.asset))
+        return (PanelAsset, (self.panel, self.asset))
+
+    def read(self, start = 0, stop = None):
+        """
+        Reads a range of the asset's rows, as per OHLCStore.read. The field values are a (read-only, for cached panels) view of the panel.
+
+        Parameters:
+        start (int): First row.
+        stop (int = None): Last row (exclusive). Defaults to the last row.
+
+        Returns:
+        data (pd.DataFrame): The rows, with the time column parsed.
+        """
+
+        if stop is None:
+            stop = self.length
+
+        data = pd.DataFrame(self.block[start:stop], columns = self.fields, copy = False)
+
+        times = pd.to_datetime(self.arrays['time'][start:stop])
+        if self.tz is not None:
+            times = times.tz_localize('UTC').tz_convert(self.tz)
+        data.insert(0, 'time', times)
+
+        return data
@@ -0,0 +1,193 @@
+import pandas as pd
+import numpy as np
+import os
+import datetime
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from ExecutionKernel import executeSignals, CLOSE_LONG, CLOSE_SHORT
+from PerformanceMetrics import computeMetrics, getPeriodsPerYear
+
+#Broker parameters that can be swept, in BacktestRunner.loadBroker order. None of these change the strategy signals.
+BROKER_PARAMS = ['stopLoss', 'takeProfit', 'guaranteedSl', 'brokerCost', 'limitType', 'dynamicLimits', 'holdDirection']
+
+#Signals and prices shared by every grid point, set once per worker process.
+_sweepData = None
+
+#Limit on the (grid points x bars) values held at once for the metrics - grid points are batched to stay within it.
+METRICS_BATCH_CELLS = 1 << 24
+
+def buildGrid(paramGrid):
+    """
+    Expands a parameter grid into the list of broker settings to run.
+
+    Parameters:
+    paramGrid (dict or list of dicts): Either a dict of parameter name -> list of values (every combination is run),
+        or a list of dicts giving each setting explicitly. Names are as per BROKER_PARAMS, all of which are required.
+
+    Returns:
+    grid (list of dicts): One dict of broker parameters per grid point.
+    """
+
+    if isinstance(paramGrid, dict):
+        names = list(paramGrid.keys())
+        grid = [dict(zip(names, values)) for values in itertools.product(*[paramGrid[name] for name in names])]
+    else:
+        grid = [dict(params) for params in paramGrid]
+
+    for params in grid:
+        missing = [name for name in BROKER_PARAMS if name not in params]
+        unknown = [name for name in params if name not in BROKER_PARAMS]
+        if len(missing) > 0 or len(unknown) > 0:
+            raise Exception ("Invalid sweep parameters - missing: {} | unknown: {}. Please use {}.".format(missing, unknown, BROKER_PARAMS))
+
+    return grid
+
+def computeSignals(Backtest, runType = 1, params = None):
+    """
+    Runs the strategy once over the prepared data, collecting its signals without any broker logic.
+
+    Parameters:
+    Backtest (BacktestRunner): Backtest object, after .prepData().
+    runType (int): As per BacktestRunner.runBacktest.
+    params (dict = None): Broker parameters to load the broker with. These don't affect the signals, but set the broker used for .runReports().
+        Defaults to no limits/costs.
+
+    Returns:
+    signals (np.ndarray): int8 signal per row of Backtest.data (0 before inputRowSize - 1 and on the last row).
+    """
+
+    if params is None:
+        params = {'stopLoss': -np.inf, 'takeProfit': np.inf, 'guaranteedSl': False, 'brokerCost': 0.0, 'limitType': 'Flat', \
+            'dynamicLimits': False, 'holdDirection': True}
+
+    Backtest.loadBroker(*[params[name] for name in BROKER_PARAMS])
+    Backtest.runBacktest(runType, engine = 'kernel')
+
+    return Backtest.broker.signal_list.copy()
+
+def getSweepData(Backtest, signals):
+    """
+    Parameters:
+    Backtest (BacktestRunner): Backtest object, after .prepData().
+    signals (array-like): Signals per row of Backtest.data.
+
+    Returns:
+    sweepData (tuple): (signals, open, high, low, close, first index, bars per year) shared by every broker pass. 
+        Arrays are views of the Backtest data where already of the right type.
+    """
+
+    data = Backtest.data
+    return (np.asarray(signals, dtype = np.int64), np.asarray(data['open'].values, dtype = np.float64), \
+        np.asarray(data['high'].values, dtype = np.float64), np.asarray(data['low'].values, dtype = np.float64), \
+        np.asarray(data['close'].values, dtype = np.float64), Backtest.inputRowSize - 1, \
+        getPeriodsPerYear(data['time'].iloc[Backtest.inputRowSize - 1:-1]))
+
+def initWorker(sweepData):
+    """
+    Sets the data shared by every grid point in this process - called once per worker process (as the pool initializer),
+        or directly before runGridPoints() when running in this process.
+
+    Parameters:
+    sweepData (tuple): As per getSweepData().
+    """
+
+    global _sweepData
+    _sweepData = sweepData
+
+def runGridPoints(grid, start = None, stop = None):
+    """
+    Broker pass per grid point over [start, stop), using the data set by initWorker().
+
+    Parameters:
+    grid (list of dicts): Broker parameters per grid point, as per buildGrid().
+    start (int = None), stop (int = None): The index range executed - the full data by default, or e.g. a walk forward training fold.
+
+    Returns:
+    results (list of dicts): Per grid point, the broker parameters followed by the Summary trade statistics and metrics.
+    """
+
+    signals, openPrices, highPrices, lowPrices, closePrices, firstIndex, periodsPerYear = _sweepData
+    if start is None:
+        start = firstIndex
+    bars = (len(openPrices) - 1 if stop is None else stop) - start
+    batchSize = max(METRICS_BATCH_CELLS // max(bars, 1), 1)
+
+    results = []
+    for batchStart in range(0, len(grid), batchSize):
+        batch = grid[batchStart:batchStart + batchSize]
+        equity = np.empty((len(batch), bars))
+        position = np.empty((len(batch), bars), dtype = np.int8)
+        closes = np.empty((len(batch), bars), dtype = bool)
+
+        for i, params in enumerate(batch):
+            execution = executeSignals(signals, openPrices, highPrices, lowPrices, closePrices, *[params[name] for name in BROKER_PARAMS], \
+                start = start, stop = stop)
+            totalProfit, tradesTotal, tradesWon, tradesLost, tradesTied = execution['state'][5:]
+            equity[i] = execution['Total profit'][start:]
+            position[i] = execution['position'][start:]
+            action = execution['action'][start:]
+            closes[i] = (action == CLOSE_LONG) | (action == CLOSE_SHORT)
+
+            results.append({**params, 'Total Trades': tradesTotal, 'Total P/L': totalProfit, \
+                'Trades Won (n)': tradesWon, 'Trades Won (%)': (tradesWon/tradesTotal) * 100 if tradesTotal > 0 else 0, \
+                'Trades Lost (n)': tradesLost, 'Trades Lost (%)': (tradesLost/tradesTotal) * 100 if tradesTotal > 0 else 0, \
+                'Trades Tied (n)': tradesTied, 'Trades Tied (%)': (tradesTied/tradesTotal) * 100 if tradesTotal > 0 else 0})
+
+        #Metrics of the whole batch in one call.
+        for result, metrics in zip(results[batchStart:], computeMetrics(equity, position, closes, periodsPerYear).to_dict('records')):
+            result.update(metrics)
+
+    return results
+
+def runSweep(Backtest, paramGrid, runType = 1, workers = None, signals = None):
+    """
+    Backtests a grid of broker parameters (stop loss, take profit, costs etc.) against a single dataset and strategy.
+    The strategy is run once to collect its signals, and only the broker logic (see ExecutionKernel) is replayed per grid point,
+    split across a pool of worker processes. Each grid point gives the same result as a full backtest with those parameters.
+
+    Parameters:
+    Backtest (BacktestRunner): Backtest object, after .prepData(). Its broker is loaded with the first grid point.
+    paramGrid (dict or list of dicts): Broker parameters to run - see buildGrid().
+    runType (int): As per BacktestRunner.runBacktest.
+    workers (int = None): Number of worker processes. Defaults to the number of CPUs. 1 runs in this process.
+    signals (array-like = None): Precomputed signals (see computeSignals()), e.g. to reuse across several sweeps. Computed if not provided.
+
+    Returns:
+    results (pd.DataFrame): One row per grid point - the broker parameters followed by the Summary trade statistics and the metrics of
+        PerformanceMetrics.computeMetrics.
+    """
+
+    startTime = time.time()
+    grid = buildGrid(paramGrid)
+
+    if signals is None:
+        signals = computeSignals(Backtest, runType, grid[0])
+
+    sweepData = getSweepData(Backtest, signals)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(min(workers, len(grid)), 1)
+
+    print("Commencing Sweep of {} broker settings".format(len(grid)))
+    if workers == 1:
+        initWorker(sweepData)
+        results = runGridPoints(grid)
+    else:
+        #Several grid points per task keeps the inter-process overhead small next to each (fast) broker pass.
+        chunkSize = -(-len(grid) // (workers * 4))
+        chunks = [grid[i:i + chunkSize] for i in range(0, len(grid), chunkSize)]
+        with ProcessPoolExecutor(max_workers = workers, initializer = initWorker, initargs = (sweepData,)) as pool:
+            results = [result for chunkResults in pool.map(runGridPoints, chunks) for result in chunkResults]
+
+    results = pd.DataFrame(results)
+    results.insert(0, 'Asset', Backtest.asset)
+    results.insert(1, 'Frequency', Backtest.frequencyStr)
+    results.insert(2, 'Start', Backtest.startDate.strftime("%Y-%m-%d %H:%S"))
+    results.insert(3, 'End', Backtest.endDate.strftime("%Y-%m-%d %H:%S"))
+
+    print("Sweep finished | TimeConsumed: {}".format(datetime.timedelta(seconds = time.time() - startTime)))
+
+    return results
@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+
+#Metric columns, in the order returned by computeMetrics.
+METRICS = ['Sharpe Ratio', 'Sortino Ratio', 'Max Drawdown', 'Max Drawdown Duration (bars)', 'Profit Factor', 'Expectancy', \
+    'Exposure (%)', 'Average Holding Period (bars)']
+
+def computeMetrics(equity, position, closes, periodsPerYear = None):
+    """
+    Risk/performance metrics of many backtests in one batched call - every metric is a NumPy reduction over the bars axis.
+    Total profit only changes when a trade is closed, so each trade's net P/L is the change in equity at its closing bar, and no trade list is needed.
+
+    Parameters:
+    equity (array-like of float): Total profit per bar, shape (runs, bars) - or (bars,) for a single backtest. The backtest starts from 0.
+    position (array-like of int): Position held at the end of each bar (1, 0, -1), as per the History 'position' column. Same shape as equity.
+    closes (array-like of bool): True at the bars where a trade is closed, as per the History 'action' column. Same shape as equity.
+    periodsPerYear (float = None): Bars per year, used to annualise the Sharpe and Sortino ratios - see getPeriodsPerYear().
+        None to leave them per bar.
+
+    Returns:
+    metrics (pd.DataFrame): One row per run, with the columns of METRICS.
+        Sharpe/Sortino are of the per bar change in Total profit (mean over standard/downside deviation), as the backtest has no capital base.
+        Max Drawdown is in P/L terms from the highest Total profit so far, and its duration is the longest time (in bars) spent below such a high.
+        Profit Factor is gross profit over gross loss of the closed trades, and Expectancy their mean net P/L.
+        Exposure is the share of bars a position is held, and the Average Holding Period the bars held per closed trade
+            (bars after the last close - a trade still open at the end - are left out).
+    """
+
+    equity = np.atleast_2d(np.asarray(equity, dtype = np.float64))
+    position = np.atleast_2d(np.asarray(position))
+    closes = np.atleast_2d(np.asarray(closes, dtype = bool))
+    runs, bars = equity.shape
+
+    #Per bar P/L - non zero only at closing bars.
+    equity = np.concatenate([np.zeros((runs, 1)), equity], axis = 1)
+    changes = np.diff(equity, axis = 1)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        #Sharpe/Sortino
+        mean = changes.mean(axis = 1)
+        std = changes.std(axis = 1, ddof = 1) if bars > 1 else np.full(runs, np.nan)
+        downside = np.sqrt(np.mean(np.minimum(changes, 0.0) ** 2, axis = 1))
+        scale = 1.0 if periodsPerYear is None else np.sqrt(periodsPerYear)
+        sharpe = np.where(std > 0, mean / std * scale, np.nan)
+        sortino = np.where(downside > 0, mean / downside * scale, np.nan)
+
+        #Drawdown - from the running high of Total profit (starting at 0).
+        peak = np.maximum.accumulate(equity, axis = 1)
+        maxDrawdown = np.max(peak - equity, axis = 1)
+        barIndex = np.arange(bars + 1)
+        lastPeak = np.maximum.accumulate(np.where(equity >= peak, barIndex, 0), axis = 1)
+        maxDrawdownDuration = np.max(barIndex - lastPeak, axis = 1)
+
+        #Trades
+        tradePL = np.where(closes, changes, 0.0)
+        tradesTotal = closes.sum(axis = 1)
+        grossProfit = np.where(tradePL > 0, tradePL, 0.0).sum(axis = 1)
+        grossLoss = -np.where(tradePL < 0, tradePL, 0.0).sum(axis = 1)
+        profitFactor = np.where(grossLoss > 0, grossProfit / grossLoss, np.where(grossProfit > 0, np.inf, np.nan))
+        expectancy = np.where(tradesTotal > 0, tradePL.sum(axis = 1) / tradesTotal, np.nan)
+
+        #Exposure/holding - bars up to and including the last close belong to a closed trade.
+        inPosition = position != 0
+        closedBars = np.cumsum(closes[:, ::-1], axis = 1)[:, ::-1] > 0
+        exposure = inPosition.mean(axis = 1) * 100
+        holdingPeriod = np.where(tradesTotal > 0, (inPosition & closedBars).sum(axis = 1) / tradesTotal, np.nan)
+
+    return pd.DataFrame({'Sharpe Ratio': sharpe, 'Sortino Ratio': sortino, 'Max Drawdown': maxDrawdown, \
+        'Max Drawdown Duration (bars)': maxDrawdownDuration, 'Profit Factor': profitFactor, 'Expectancy': expectancy, \
+        'Exposure (%)': exposure, 'Average Holding Period (bars)': holdingPeriod}, columns = METRICS)
+
+def getPeriodsPerYear(times):
+    """
+    Parameters:
+    times (pd.Series): Bar times of the backtest.
+
+    Returns:
+    periodsPerYear (float): The average number of bars per year in the data (so allowing for market hours/holidays), or None where it can't be told.
+    """
+
+    if not pd.api.types.is_datetime64_any_dtype(times.dtype):
+        #Times with a mix of utc offsets.
+        times = pd.to_datetime(times, utc = True)
+    years = (times.iloc[-1] - times.iloc[0]) / pd.Timedelta(days = 365.25) if len(times) > 1 else 0
+    return (len(times) - 1) / years if years > 0 else None
+
+def getMetrics(historyData):
+    """
+    Parameters:
+    historyData (pd.DataFrame): The backtest History, as exported by BacktestRunner.runReports (from the first executed bar).
+
+    Returns:
+    metrics (pd.DataFrame): A single row, as per computeMetrics().
+    """
+
+    closes = historyData['action'].isin(['close long', 'close short']).values
+    return computeMetrics(historyData['Total profit'].values, historyData['position'].values, closes, getPeriodsPerYear(historyData['time']))
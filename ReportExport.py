@@ -0,0 +1,184 @@
+import pandas as pd
+import numpy as np
+import os
+import importlib.util
+import queue
+import threading
+import traceback
+
+#History export modes of BacktestRunner.runReports:
+    #'csv' - History.csv.
+    #'parquet'/'feather' - History.parquet/History.feather, compressed with typed columns. Requires pyarrow.
+    #'npz' - History.npz, a compressed numpy archive of one typed array per column. No further dependencies.
+    #'summary' - no History file, and the full History frame is never built. Only the (small) summary reports are exported.
+EXPORT_MODES = ['csv', 'parquet', 'feather', 'npz', 'summary']
+
+#Modes requiring pyarrow.
+ARROW_MODES = ['parquet', 'feather']
+
+def checkExportMode(exportMode):
+    """
+    Raises an exception for an unknown export mode, or one whose dependencies aren't installed - before anything is run or exported.
+
+    Parameters:
+    exportMode (str): One of EXPORT_MODES.
+    """
+
+    if exportMode not in EXPORT_MODES:
+        raise Exception ("Unknown export mode '{}' - please use one of {}.".format(exportMode, EXPORT_MODES))
+    if exportMode in ARROW_MODES and importlib.util.find_spec('pyarrow') is None:
+        raise Exception ("Exporting the History as {} requires pyarrow (pip install pyarrow) - alternatively use the 'npz' or 'csv' export mode.".format(exportMode))
+
+def toColumnar(historyData):
+    """
+    Parameters:
+    historyData (pd.DataFrame): The backtest History.
+
+    Returns:
+    historyData (pd.DataFrame): The History with typed columns - times with a mix of utc offsets (e.g. across daylight saving) as utc datetimes,
+        rather than objects.
+    """
+
+    if not pd.api.types.is_datetime64_any_dtype(historyData['time'].dtype):
+        historyData = historyData.assign(time = pd.to_datetime(historyData['time'], utc = True))
+    return historyData
+
+def toArrays(historyData):
+    """
+    Parameters:
+    historyData (pd.DataFrame): The backtest History.
+
+    Returns:
+    arrays (dict): Column name -> numpy array, as saved in a History.npz. Times are datetime64 in utc (or wall clock time where the data has no timezone),
+        and text (e.g. the action) fixed width unicode, such that the file loads without pickle.
+    """
+
+    arrays = {}
+    for column, values in toColumnar(historyData).items():
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            arrays[column] = values.dt.tz_convert('UTC').dt.tz_localize(None).values
+        elif isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values.dtype):
+            #Text, whether object, categorical or a pandas string dtype - missing values are saved as empty strings.
+            arrays[column] = np.asarray(values.astype(object).fillna(''), dtype = np.str_)
+        else:
+            arrays[column] = values.values
+    return arrays
+
+def writeHistory(historyData, subfolderDir, exportMode = 'csv'):
+    """
+    Parameters:
+    historyData (pd.DataFrame): The backtest History.
+    subfolderDir (str): The export folder.
+    exportMode (str): One of EXPORT_MODES, other than 'summary'.
+
+    Returns:
+    historyDir (str): The file written.
+    """
+
+    historyDir = os.path.join(subfolderDir, "History." + exportMode).replace('\\', '/')
+
+    if exportMode == 'csv':
+        historyData.to_csv(historyDir, index = False)
+    elif exportMode == 'parquet':
+        toColumnar(historyData).to_parquet(historyDir, index = False)
+    elif exportMode == 'feather':
+        toColumnar(historyData).reset_index(drop = True).to_feather(historyDir)
+    elif exportMode == 'npz':
+        np.savez_compressed(historyDir, **toArrays(historyData))
+    else:
+        raise Exception ("Export mode '{}' has no History file.".format(exportMode))
+
+    return historyDir
+
+def writeReports(subfolderDir, historyData, reports, exportMode = 'csv'):
+    """
+    Writes a backtest's report files - see BacktestRunner.runReports.
+
+    Parameters:
+    subfolderDir (str): The export folder.
+    historyData (pd.DataFrame): The backtest History, written as per writeHistory (unless exportMode is 'summary').
+    reports (dict): Filename -> dataframe of the other reports, written as csv.
+    exportMode (str): One of EXPORT_MODES.
+    """
+
+    if exportMode != 'summary':
+        writeHistory(historyData, subfolderDir, exportMode)
+    for filename, reportData in reports.items():
+        reportData.to_csv(os.path.join(subfolderDir, filename).replace('\\', '/'), index = False)
+
+class ReportWriter:
+    """
+    Writes report files on a background thread, such that the next backtest can run while the previous one's reports are written to disk.
+    At most maxPending exports wait in the queue - submitting another blocks until one is written, which bounds the memory held by pending reports.
+
+    Exports failing don't stop the thread - they are kept in .errors and raised by .flush() (or on leaving a with block).
+    The writer must be flushed/stopped before the program ends, as pending exports are lost otherwise.
+    """
+
+    def __init__(self, maxPending = 2):
+        """
+        Parameters:
+        maxPending (int): Number of exports which can wait to be written.
+        """
+
+        self.queue = queue.Queue(maxsize = maxPending)
+        #label -> traceback string, per failed export.
+        self.errors = {}
+        self.thread = threading.Thread(target = self._run, name = "ReportWriter", daemon = True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                label, function, args = task
+                try:
+                    function(*args)
+                except Exception:
+                    self.errors[label] = traceback.format_exc()
+            finally:
+                self.queue.task_done()
+
+    def submit(self, label, function, *args):
+        """
+        Queues function(*args) to be run on the writer thread, blocking while the queue is full.
+
+        Parameters:
+        label (str): Name of the export in .errors should it fail, e.g. the export folder.
+        function (callable): The export, e.g. writeReports.
+        """
+
+        if not self.thread.is_alive():
+            raise Exception ("Report writer has been stopped.")
+        self.queue.put((label, function, args))
+
+    def join(self):
+        #Waits for every queued export to be written (or fail).
+        self.queue.join()
+
+    def flush(self):
+        """
+        Waits for every queued export, then raises an exception should any have failed.
+        """
+
+        self.join()
+        if len(self.errors) > 0:
+            raise Exception ("Report export failed for {}:\n{}".format(list(self.errors.keys()), "\n".join(self.errors.values())))
+
+    def stop(self):
+        #Writes the queued exports, then ends the thread.
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, excTraceback):
+        try:
+            if excType is None:
+                self.flush()
+        finally:
+            self.stop()
@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+
+from DataReader import FREQUENCIES
+
+#Aggregation of each (normalised) column when building higher timeframe bars. Any other column takes the bar's last value.
+    #Bid/ask (e.g. from DataFunctions.DataConcatenator) are the prices at the bar open, so take the first value along with the open price.
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', \
+    'bid': 'first', 'ask': 'first', 'replacedbidask': 'first', \
+    'tickvol': 'sum', 'vol': 'sum', 'volume': 'sum', 'spread': 'min'}
+
+def resampleData(fullData, sourceFrequencyStr, frequencyStr):
+    """
+    Builds higher timeframe bars (e.g. M15 or H1) from finer data (e.g. M1), as per AGGREGATIONS.
+    Bars are labelled by their start time, as per MT5 exports, and periods without any source rows are left out rather than filled.
+
+    Parameters:
+    fullData (pd.DataFrame): Data with a 'time' column, as per BacktestRunner.readData. Must be in time order.
+    sourceFrequencyStr (str): Frequency of fullData, e.g. 'M1'.
+    frequencyStr (str): Frequency to build, e.g. 'H1'. Must be a multiple of the source frequency.
+
+    Returns:
+    resampled (pd.DataFrame): The higher timeframe data, with the same columns.
+    """
+
+    if frequencyStr not in FREQUENCIES or sourceFrequencyStr not in FREQUENCIES:
+        raise Exception ("Unrecognised resampling frequency {} -> {} - please use one of {}.".format(sourceFrequencyStr, frequencyStr, list(FREQUENCIES.keys())))
+
+    frequency = FREQUENCIES[frequencyStr]
+    sourceFrequency = FREQUENCIES[sourceFrequencyStr]
+    if frequency == sourceFrequency:
+        return fullData
+    if frequency < sourceFrequency or frequency % sourceFrequency != pd.Timedelta(0):
+        raise Exception ("Cannot resample {} data to {} - the target must be a multiple of the source frequency.".format(sourceFrequencyStr, frequencyStr))
+
+    times = fullData['time']
+    if not pd.api.types.is_datetime64_any_dtype(times.dtype):
+        raise Exception ("Resampling requires a datetime time column with a single timezone (not a mix of utc offsets).")
+    if not times.is_monotonic_increasing:
+        raise Exception ("Resampling requires data in time order.")
+
+    #Rows are in time order, so each bar is a contiguous run of rows - aggregated with ufunc.reduceat over the run starts.
+    barTimes = times.dt.floor(frequency)
+    barValues = barTimes.values
+    starts = np.flatnonzero(np.r_[True, barValues[1:] != barValues[:-1]])
+    ends = np.r_[starts[1:], len(fullData)] - 1
+
+    resampled = {'time': barTimes.iloc[starts].reset_index(drop = True)}
+    for column in fullData.columns:
+        if column == 'time':
+            continue
+        values = fullData[column].values
+        aggregation = AGGREGATIONS.get(column, 'last')
+        if aggregation == 'first':
+            resampled[column] = values[starts]
+        elif aggregation == 'last':
+            resampled[column] = values[ends]
+        elif aggregation == 'max':
+            resampled[column] = np.maximum.reduceat(values, starts)
+        elif aggregation == 'min':
+            resampled[column] = np.minimum.reduceat(values, starts)
+        elif aggregation == 'sum':
+            resampled[column] = np.add.reduceat(values, starts)
+
+    return pd.DataFrame(resampled)
@@ -1,5 +1,9 @@
 import pandas as pd
+import numpy as np
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from .IndicatorFunctions import StreamingIndicators
 
 '''
 @ Vita
@@ -8,12 +12,25 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class BB_ATR:
+class BB_ATR(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "BB_ATR"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.bb = StreamingIndicators.BollingerBands(window = 20, window_dev = 2)
+        self.rsi = StreamingIndicators.RSI(window = 14)
+        self.atr = StreamingIndicators.ATR(window = 14)
+        self.feed = StreamingIndicators.BarFeed(['bb_bbh', 'bb_bbl', 'bb_bbm', 'rsi', 'atr'], lookback = 2)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the indicator values in the order of the feed columns.
+        bb_bbm, bb_bbh, bb_bbl = self.bb.update(close)
+        return bb_bbh, bb_bbl, bb_bbm, self.rsi.update(close), self.atr.update(high, low, close)
 
     def addData(self, data):
         
@@ -30,8 +47,6 @@ class BB_ATR:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
         
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)       
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
@@ -97,6 +112,26 @@ class BB_ATR:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        df = self.df
+        close, high, low = df.close, df.high, df.low
+        prev_close, prev_high, prev_low = close.shift(1), high.shift(1), low.shift(1)
+        prev_bbl, prev_bbh = df.bb_bbl.shift(1), df.bb_bbh.shift(1)
+
+        buy = (close > prev_close) & \
+            ((100*abs(low-df.bb_bbl)/low < 2.0) | (abs(100*high-df.bb_bbl)/high < 2.0)) & \
+            ((abs(100*prev_low-prev_bbl)/prev_low < 2.0) | (abs(100*prev_high-prev_bbl)/prev_high < 2.0)) & \
+            (abs(prev_low-close) > df.atr) & (abs(low-close) > df.atr)
+
+        sell = (close < prev_close) & \
+            ((100*abs(high-df.bb_bbh)/high < 2.0) | (100*abs(low-df.bb_bbh)/low < 2.0)) & \
+            ((100*abs(prev_high-prev_bbh)/prev_high < 2.0) | (100*abs(prev_low-prev_bbh)/prev_low < 2.0)) & \
+            (abs(prev_high-close) > df.atr)
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -106,3 +141,19 @@ class BB_ATR:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands, RSI and ATR once over the full data, then the band/ATR conditions of determine_signal() for every row together.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
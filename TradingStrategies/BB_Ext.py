@@ -1,5 +1,8 @@
 import pandas as pd
+import numpy as np
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
 
 '''
 @ Vita
@@ -10,6 +13,8 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 
 class BB_Ext:
 
+    mutatesInput = True
+
     def __init__(self):
         
         self.Name = "BB_Ext"
@@ -31,8 +36,6 @@ class BB_Ext:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
         self.df['bb_bbh'] = indicator_bb.bollinger_hband()
@@ -80,6 +83,25 @@ class BB_Ext:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        # max/min(df.close[:-50]) is taken over all closes prior to the last 50 rows, which over the full data is an expanding max/min.
+        df = self.df
+        close = df.close
+        prev_high, prev_low = df.high.shift(1), df.low.shift(1)
+        prev_bbl, prev_bbh = df.bb_bbl.shift(1), df.bb_bbh.shift(1)
+        prior_max = close.shift(50).expanding().max()
+        prior_min = close.shift(50).expanding().min()
+
+        buy = ((close > prev_high) & ((abs(prev_low-prev_bbl) < 0.0003) | (abs(prev_high-prev_bbl) < 0.0003))) | \
+            ((close > prev_high) & (close > prev_bbh) & (close > prior_max))
+
+        sell = ((close < prev_low) & ((abs(prev_high-prev_bbh) < 0.0003) | (abs(prev_low-prev_bbh) < 0.0003))) | \
+            ((close < prev_low) & (close < prev_bbl) & (close < prior_min))
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -89,3 +111,20 @@ class BB_Ext:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands once over the full data. For the breakout condition, the closes before the last 50 rows of run()'s window
+            become every close more than 50 rows back, i.e. an expanding max/min.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
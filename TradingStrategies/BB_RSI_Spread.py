@@ -1,5 +1,9 @@
 import pandas as pd
+import numpy as np
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from .IndicatorFunctions import StreamingIndicators
 
 '''
 @ Vita
@@ -8,12 +12,29 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class BB_RSI_Spread:
+class BB_RSI_Spread(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "BB_RSI_Spread"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.bb = StreamingIndicators.BollingerBands(window = 20, window_dev = 2)
+        self.rsi = StreamingIndicators.RSI(window = 14)
+        #Sample (ddof = 1) standard deviation, as per pandas .rolling().std().
+        self.spread_std = StreamingIndicators.RollingMeanStd(window = 14, ddof = 1)
+        self.feed = StreamingIndicators.BarFeed(['bb_bbh', 'bb_bbl', 'bb_bbm', 'rsi', 'bb_spread', 'bb_spread_stdev'], lookback = 2)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the indicator values in the order of the feed columns.
+        bb_bbm, bb_bbh, bb_bbl = self.bb.update(close)
+        bb_spread = bb_bbh - bb_bbl
+        #The spread is nan until the bands are, and pandas' rolling std only counts bars from its first value.
+        bb_spread_stdev = self.spread_std.update(bb_spread)[1] if bb_spread == bb_spread else np.nan
+        return bb_bbh, bb_bbl, bb_bbm, self.rsi.update(close), bb_spread, bb_spread_stdev
 
     def addData(self, data):
         
@@ -32,8 +53,6 @@ class BB_RSI_Spread:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
         self.df['bb_bbh'] = indicator_bb.bollinger_hband()
@@ -83,6 +102,20 @@ class BB_RSI_Spread:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        df = self.df
+        close = df.close
+        prev_high, prev_low = df.high.shift(1), df.low.shift(1)
+        prev_bbl, prev_bbh = df.bb_bbl.shift(1), df.bb_bbh.shift(1)
+        spread_check = df.bb_spread_stdev <= df.bb_spread
+
+        buy = (close > prev_high) & (((prev_low-prev_bbl) < 0.0003) | ((prev_high-prev_bbl) < 0.0003)) & spread_check
+        sell = (close < prev_low) & (((prev_high-prev_bbh) < 0.0003) | ((prev_low-prev_bbh) < 0.0003)) & spread_check
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -92,3 +125,20 @@ class BB_RSI_Spread:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands, their spread and its 14 bar standard deviation once over the full data, then the conditions of determine_signal()
+            for every row together.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -1,5 +1,9 @@
 import pandas as pd
+import numpy as np
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from .IndicatorFunctions import StreamingIndicators
 
 '''
 @ Vita
@@ -8,12 +12,24 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class BB_Simple:
+class BB_Simple(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "BB_Simple"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.bb = StreamingIndicators.BollingerBands(window = 20, window_dev = 2)
+        self.rsi = StreamingIndicators.RSI(window = 14)
+        self.feed = StreamingIndicators.BarFeed(['bb_bbh', 'bb_bbl', 'bb_bbm', 'rsi'], lookback = 2)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the indicator values in the order of the feed columns.
+        bb_bbm, bb_bbh, bb_bbl = self.bb.update(close)
+        return bb_bbh, bb_bbl, bb_bbm, self.rsi.update(close)
 
     def addData(self, data):
         
@@ -30,8 +46,6 @@ class BB_Simple:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
         self.df['bb_bbh'] = indicator_bb.bollinger_hband()
@@ -78,6 +92,24 @@ class BB_Simple:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        df = self.df
+        close, high, low = df.close, df.high, df.low
+        prev_high, prev_low = high.shift(1), low.shift(1)
+        prev_bbl, prev_bbh = df.bb_bbl.shift(1), df.bb_bbh.shift(1)
+
+        buy = (close > prev_high) & \
+            ((100*abs(low-df.bb_bbl)/low < 1.0) | (abs(100*high-df.bb_bbl)/high < 1.0)) & \
+            ((abs(100*prev_low-prev_bbl)/prev_low < 0.1) | (abs(100*prev_high-prev_bbl)/prev_high < 1.0))
+
+        sell = (close < prev_low) & \
+            ((100*abs(high-df.bb_bbh)/high < 1.0) | (100*abs(low-df.bb_bbh)/low < 1.0)) & \
+            ((100*abs(prev_high-prev_bbh)/prev_high < 1.0) | (100*abs(prev_low-prev_bbh)/prev_low < 1.0))
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -87,3 +119,20 @@ class BB_Simple:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands (and RSI, stored only) once over the full data, and flags every row where price closes through the previous bar
+            while near a band.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -1,5 +1,9 @@
 import pandas as pd
+import numpy as np
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from .IndicatorFunctions import StreamingIndicators
 
 '''
 @ Vita
@@ -8,12 +12,24 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class M5:
+class M5(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "M5"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.bb = StreamingIndicators.BollingerBands(window = 20, window_dev = 2)
+        self.rsi = StreamingIndicators.RSI(window = 14)
+        self.feed = StreamingIndicators.BarFeed(['bb_bbh', 'bb_bbl', 'bb_bbm', 'rsi'], lookback = 2)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the indicator values in the order of the feed columns.
+        bb_bbm, bb_bbh, bb_bbl = self.bb.update(close)
+        return bb_bbh, bb_bbl, bb_bbm, self.rsi.update(close)
 
     def addData(self, data):
         
@@ -30,8 +46,6 @@ class M5:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
         self.df['bb_bbh'] = indicator_bb.bollinger_hband()
@@ -73,6 +87,17 @@ class M5:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        df = self.df
+        prev_bbm = df.bb_bbm.shift(1)
+
+        buy = (df.close > df.high.shift(1)) & (df.high.shift(1) > prev_bbm) & (df.close < df.bb_bbm)
+        sell = (df.close < df.low.shift(1)) & (df.low.shift(1) > prev_bbm) & (df.close < df.bb_bbm)
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -82,3 +107,20 @@ class M5:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands once over the full data, and flags every row where the previous bar sat above the middle band
+            and this one closes below it.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -1,7 +1,10 @@
 import pandas as pd
 import ta
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from ta.trend import sma_indicator
+from .IndicatorFunctions import StreamingIndicators
 import datetime as dt
-from sklearn import linear_model
 import numpy as np
 '''
 @ Vita
@@ -10,12 +13,25 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class BBmv50:
+class BBmv50(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "BBmv50"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.bb = StreamingIndicators.BollingerBands(window = 20, window_dev = 2)
+        self.rsi = StreamingIndicators.RSI(window = 14)
+        self.mv50 = StreamingIndicators.SMA(window = 50)
+        self.feed = StreamingIndicators.BarFeed(['bb_bbh', 'bb_bbl', 'bb_bbm', 'rsi', 'mv50'], lookback = 20)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the indicator values in the order of the feed columns.
+        bb_bbm, bb_bbh, bb_bbl = self.bb.update(close)
+        return bb_bbh, bb_bbl, bb_bbm, self.rsi.update(close), self.mv50.update(close)
 
     def addData(self, data):
         
@@ -33,9 +49,6 @@ class BBmv50:
         
     def add_bollinger_bands(self):
         # Add Bollinger Bands features
-        from ta.volatility import BollingerBands
-        from ta.momentum import RSIIndicator
-        from ta.trend import sma_indicator
         
         indicator_bb = BollingerBands(close=self.df["close"], window=20, window_dev=2)
         self.df['bb_bbm'] = indicator_bb.bollinger_mavg()
@@ -91,6 +104,31 @@ class BBmv50:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2] is the previous row, ie shift(1).
+        # The slope of a degree 1 polyfit over the last 20 mv50 values is a fixed weighted sum, so is applied over sliding windows.
+        df = self.df
+        close = df.close
+        prev_high, prev_low = df.high.shift(1), df.low.shift(1)
+        prev_bbl, prev_bbh, prev_mv50 = df.bb_bbl.shift(1), df.bb_bbh.shift(1), df.mv50.shift(1)
+
+        x = np.arange(20)
+        weights = (x - x.mean()) / ((x - x.mean())**2).sum()
+        slope = np.full(len(df), np.nan)
+        if len(df) >= 20:
+            windows = np.lib.stride_tricks.sliding_window_view(df['mv50'].values.astype(float), 20)
+            slope[19:] = windows @ weights * 10000
+
+        near_mv50 = (abs(prev_low-prev_mv50) < 0.0003) | (abs(prev_high-prev_mv50) < 0.0003)
+
+        buy = (close > prev_high) & ((abs(prev_low-prev_bbl) < 0.0003) | (abs(prev_high-prev_bbl) < 0.0003)) & \
+            near_mv50 & (slope > 0.1)
+        sell = (close < prev_low) & ((abs(prev_high-prev_bbh) < 0.0003) | (abs(prev_low-prev_bbh) < 0.0003)) & \
+            near_mv50 & (slope < 0.1)
+
+        # sell is evaluated last in determine_signal, so takes precedence
+        return np.where(sell, -1, np.where(buy, 1, 0))
+
     def addIndicatorDf(self):
         # self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
         self.indicatorDf = self.df[['time', 'bb_bbh','bb_bbl', 'rsi']]
@@ -100,3 +138,20 @@ class BBmv50:
         self.add_bollinger_bands()
         self.addIndicatorDf()
         return self.determine_signal() , self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the Bollinger Bands and 50 bar moving average once over the full data. The slope of the last 20 mv50 values is a rolling weighted sum
+            rather than a polyfit per row.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, bb_bbh, bb_bbl and rsi columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_bollinger_bands()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -38,4 +38,33 @@ def StochasticOscilator(fullData, K = 14, D = 3, slowing = 3):
         retStochVals[subset-1] = stochVals[-1]
         retStochSigVals[subset-1] = stochSigVals
 
-    return retStochVals, retStochSigVals
\ No newline at end of file
+    return retStochVals, retStochSigVals
+
+#Whole-series version of the above - same values, computed with rolling windows rather than re-slicing the data for every row.
+#Summation order matches the loops above so values are identical, not just close.
+
+def StochasticOscilatorVectorised(fullData, K = 14, D = 3, slowing = 3):
+
+    lowestLow = fullData['low'].rolling(K).min()
+    highestHigh = fullData['high'].rolling(K).max()
+    closeLow = fullData['close'] - lowestLow
+    highLow = highestHigh - lowestLow
+
+    sum_low = 0
+    sum_high = 0
+    for j in reversed(range(slowing)):
+        sum_low = sum_low + closeLow.shift(j)
+        sum_high = sum_high + highLow.shift(j)
+
+    stochVals = pd.Series(np.where(sum_high == 0, 100, (sum_low/sum_high) * 100), index = fullData.index)
+
+    stochSigVals = 0
+    for i in reversed(range(D)):
+        stochSigVals = stochSigVals + stochVals.shift(i)
+    stochSigVals = stochSigVals/D
+
+    #The loop version only starts once 2 * K rows are available
+    stochVals.iloc[:2 * K - 1] = np.nan
+    stochSigVals.iloc[:2 * K - 1] = np.nan
+
+    return stochVals.values, stochSigVals.values
@@ -0,0 +1,505 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+
+#Streaming (incremental) versions of the ta indicators used across the TradingStrategies.
+#Each indicator is an object holding its own state, and .update() takes one new bar and returns the latest value(s) in O(1).
+#Values follow the ta library implementations (BollingerBands, RSIIndicator, AverageTrueRange, MACD, PSARIndicator) with fillna = False,
+#such that a strategy can be fed one bar at a time (e.g. live) without recomputing over a window.
+#Values are nan until enough bars have been seen, as with ta.
+
+class EMA:
+    """
+    Exponential moving average, matching pandas .ewm(adjust = False).mean() as used by ta.
+    Leading nans are skipped, and min_periods counts the number of valid observations.
+    """
+
+    def __init__(self, span = None, alpha = None, min_periods = None):
+        """
+        Parameters:
+        span (int): EMA span, alpha = 2 / (span + 1). Either span or alpha is required.
+        alpha (float): Smoothing factor, e.g. 1 / window for Wilder smoothing.
+        min_periods (int = None): Number of valid observations required before a value is returned. Defaults to span, or 0 if alpha is used.
+        """
+
+        if alpha is None:
+            if span is None:
+                raise Exception ("EMA requires either span or alpha.")
+            alpha = 2 / (span + 1)
+        if min_periods is None:
+            min_periods = span if span is not None else 0
+
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.old_wt_factor = 1 - alpha
+        self.old_wt = 1
+        self.weighted = np.nan
+        self.nobs = 0
+        self.value = np.nan
+
+    def update(self, x):
+        """
+        Parameters:
+        x (float): The new observation.
+
+        Returns:
+        value (float): The latest EMA value, nan until min_periods valid observations have been seen.
+        """
+
+        is_observation = x == x
+        if self.nobs == 0:
+            if is_observation:
+                self.weighted = x
+                self.nobs = 1
+        else:
+            #Same arithmetic as pandas' ewma (adjust = False, ignore_na = False) so values line up exactly.
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                self.nobs += 1
+                if self.weighted != x:
+                    self.weighted = ((self.old_wt * self.weighted) + (self.alpha * x)) / (self.old_wt + self.alpha)
+                self.old_wt = 1
+
+        self.value = self.weighted if self.nobs >= self.min_periods else np.nan
+        return self.value
+
+
+class RollingMeanStd:
+    """
+    Rolling mean and (population, ddof = 0) standard deviation over a fixed window.
+    Running sums are kept relative to a reference level and re-synchronised from the buffer once per window,
+    which keeps the update O(1) (amortised) without the running sums drifting over long histories.
+    """
+
+    def __init__(self, window, ddof = 0):
+        """
+        Parameters:
+        window (int): Number of bars in the window.
+        ddof (int): Delta degrees of freedom for the standard deviation - 0 as per ta's Bollinger Bands, 1 as per pandas .rolling().std().
+        """
+
+        self.window = window
+        self.ddof = ddof
+        self.buffer = deque(maxlen = window)
+        self.shift = 0.0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates = 0
+        self.mean = np.nan
+        self.std = np.nan
+
+    def _resync(self):
+        self.shift = sum(self.buffer) / len(self.buffer)
+        self.sum = sum(x - self.shift for x in self.buffer)
+        self.sum_sq = sum((x - self.shift)**2 for x in self.buffer)
+
+    def update(self, x):
+        """
+        Parameters:
+        x (float): The new observation.
+
+        Returns:
+        (mean, std) (tuple of floats): Rolling mean and standard deviation, nan until the window is full.
+        """
+
+        if len(self.buffer) == self.window:
+            old = self.buffer[0] - self.shift
+            self.sum -= old
+            self.sum_sq -= old * old
+        self.buffer.append(x)
+        new = x - self.shift
+        self.sum += new
+        self.sum_sq += new * new
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._resync()
+
+        n = len(self.buffer)
+        if n < self.window or n - self.ddof <= 0:
+            self.mean = np.nan
+            self.std = np.nan
+        else:
+            centred_mean = self.sum / n
+            variance = max((self.sum_sq - n * centred_mean * centred_mean) / (n - self.ddof), 0.0)
+            self.mean = centred_mean + self.shift
+            self.std = np.sqrt(variance)
+
+        return self.mean, self.std
+
+
+class SMA:
+    """
+    Simple moving average, as per ta.trend.sma_indicator.
+    """
+
+    def __init__(self, window):
+        """
+        Parameters:
+        window (int): Number of bars in the window.
+        """
+
+        self.rolling = RollingMeanStd(window)
+        self.value = np.nan
+
+    def update(self, x):
+        """
+        Parameters:
+        x (float): The new close price.
+
+        Returns:
+        value (float): The moving average, nan until the window is full.
+        """
+
+        self.value = self.rolling.update(x)[0]
+        return self.value
+
+
+class BollingerBands:
+    """
+    Bollinger Bands, as per ta.volatility.BollingerBands.
+    """
+
+    def __init__(self, window = 20, window_dev = 2):
+        """
+        Parameters:
+        window (int): Number of bars for the moving average/standard deviation.
+        window_dev (int): Number of standard deviations for the high/low bands.
+        """
+
+        self.window_dev = window_dev
+        self.rolling = RollingMeanStd(window)
+        self.mavg = np.nan
+        self.hband = np.nan
+        self.lband = np.nan
+
+    def update(self, close):
+        """
+        Parameters:
+        close (float): The new close price.
+
+        Returns:
+        (mavg, hband, lband) (tuple of floats): Middle, high and low bands.
+        """
+
+        mavg, mstd = self.rolling.update(close)
+        self.mavg = mavg
+        self.hband = mavg + self.window_dev * mstd
+        self.lband = mavg - self.window_dev * mstd
+        return self.mavg, self.hband, self.lband
+
+
+class RSI:
+    """
+    Relative Strength Index with Wilder smoothing, as per ta.momentum.RSIIndicator.
+    """
+
+    def __init__(self, window = 14):
+        """
+        Parameters:
+        window (int): Smoothing window.
+        """
+
+        self.emaup = EMA(alpha = 1 / window, min_periods = window)
+        self.emadn = EMA(alpha = 1 / window, min_periods = window)
+        self.prev_close = np.nan
+        self.value = np.nan
+
+    def update(self, close):
+        """
+        Parameters:
+        close (float): The new close price.
+
+        Returns:
+        value (float): The RSI value, nan until window price changes have been seen.
+        """
+
+        #As per ta, the first bar (no previous close) counts as a zero change.
+        diff = close - self.prev_close
+        self.prev_close = close
+        up = diff if diff > 0 else 0.0
+        dn = -diff if diff < 0 else 0.0
+
+        emaup = self.emaup.update(up)
+        emadn = self.emadn.update(dn)
+
+        if emadn == 0:
+            self.value = 100
+        else:
+            self.value = 100 - (100 / (1 + emaup / emadn))
+        return self.value
+
+
+class ATR:
+    """
+    Average True Range, as per ta.volatility.AverageTrueRange.
+    Note that ta returns 0 (rather than nan) until the first full window, which is kept here for equivalence.
+    """
+
+    def __init__(self, window = 14):
+        """
+        Parameters:
+        window (int): Smoothing window.
+        """
+
+        self.window = window
+        self.prev_close = np.nan
+        self.count = 0
+        self.tr_sum = 0.0
+        self.value = 0.0
+
+    def update(self, high, low, close):
+        """
+        Parameters:
+        high (float): The new high price.
+        low (float): The new low price.
+        close (float): The new close price.
+
+        Returns:
+        value (float): The ATR value.
+        """
+
+        true_range = high - low
+        if self.prev_close == self.prev_close:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        self.count += 1
+        if self.count < self.window:
+            self.tr_sum += true_range
+            self.value = 0.0
+        elif self.count == self.window:
+            self.tr_sum += true_range
+            self.value = self.tr_sum / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + true_range) / float(self.window)
+        return self.value
+
+
+class MACD:
+    """
+    Moving Average Convergence Divergence, as per ta.trend.MACD.
+    """
+
+    def __init__(self, window_slow = 26, window_fast = 12, window_sign = 9):
+        """
+        Parameters:
+        window_slow (int): Slow EMA span.
+        window_fast (int): Fast EMA span.
+        window_sign (int): Signal line EMA span.
+        """
+
+        self.ema_fast = EMA(span = window_fast)
+        self.ema_slow = EMA(span = window_slow)
+        self.ema_sign = EMA(span = window_sign)
+        self.macd = np.nan
+        self.macd_signal = np.nan
+        self.macd_diff = np.nan
+
+    def update(self, close):
+        """
+        Parameters:
+        close (float): The new close price.
+
+        Returns:
+        (macd, macd_signal, macd_diff) (tuple of floats): MACD line, signal line and histogram.
+        """
+
+        self.macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        self.macd_signal = self.ema_sign.update(self.macd)
+        self.macd_diff = self.macd - self.macd_signal
+        return self.macd, self.macd_signal, self.macd_diff
+
+
+class PSAR:
+    """
+    Parabolic Stop and Reverse, as per ta.trend.PSARIndicator.
+    The first two bars return the close price, as ta does.
+    """
+
+    def __init__(self, step = 0.02, max_step = 0.2):
+        """
+        Parameters:
+        step (float): Acceleration factor step.
+        max_step (float): Maximum acceleration factor.
+        """
+
+        self.step = step
+        self.max_step = max_step
+        self.up_trend = True
+        self.acceleration_factor = step
+        self.up_trend_high = None
+        self.down_trend_low = None
+        self.highs = deque(maxlen = 2)
+        self.lows = deque(maxlen = 2)
+        self.count = 0
+        self.value = np.nan
+
+    def update(self, high, low, close):
+        """
+        Parameters:
+        high (float): The new high price.
+        low (float): The new low price.
+        close (float): The new close price.
+
+        Returns:
+        value (float): The pSAR value.
+        """
+
+        if self.count == 0:
+            self.up_trend_high = high
+            self.down_trend_low = low
+
+        if self.count < 2:
+            psar = close
+        else:
+            reversal = False
+            prev_psar = self.value
+
+            if self.up_trend:
+                psar = prev_psar + (self.acceleration_factor * (self.up_trend_high - prev_psar))
+
+                if low < psar:
+                    reversal = True
+                    psar = self.up_trend_high
+                    self.down_trend_low = low
+                    self.acceleration_factor = self.step
+                else:
+                    if high > self.up_trend_high:
+                        self.up_trend_high = high
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+
+                    low1 = self.lows[-1]
+                    low2 = self.lows[-2]
+                    if low2 < psar:
+                        psar = low2
+                    elif low1 < psar:
+                        psar = low1
+            else:
+                psar = prev_psar - (self.acceleration_factor * (prev_psar - self.down_trend_low))
+
+                if high > psar:
+                    reversal = True
+                    psar = self.down_trend_low
+                    self.up_trend_high = high
+                    self.acceleration_factor = self.step
+                else:
+                    if low < self.down_trend_low:
+                        self.down_trend_low = low
+                        self.acceleration_factor = min(self.acceleration_factor + self.step, self.max_step)
+
+                    high1 = self.highs[-1]
+                    high2 = self.highs[-2]
+                    if high2 > psar:
+                        psar = high2
+                    elif high1 > psar:
+                        psar = high1
+
+            self.up_trend = self.up_trend != reversal  # XOR
+
+        self.highs.append(high)
+        self.lows.append(low)
+        self.count += 1
+        self.value = psar
+        return self.value
+
+
+def utc_time(time):
+    # Bar times as comparable utc timestamps, whether the data holds tz-aware, mixed utc offset or wall clock (taken as utc) times.
+    time = pd.Timestamp(time)
+    return time.tz_localize('UTC') if time.tzinfo is None else time.tz_convert('UTC')
+
+
+class BarFeed:
+    """
+    Helper for strategies updating streaming indicators from their on_bar window (see BacktestRunner.runBacktest).
+    Successive windows overlap, so only the rows not yet seen (by time) are fed to the indicators - the whole first window, then the newest bar.
+    The indicator values of the last few bars are kept, such that the strategy's signal logic can look back over them as over a dataframe.
+    """
+
+    def __init__(self, columns, lookback):
+        """
+        Parameters:
+        columns (list of str): Names of the indicator values, in the order returned per bar by the strategy.
+        lookback (int): Number of bars (including the newest) the signal logic looks at.
+        """
+
+        self.columns = columns
+        self.lookback = lookback
+        self.reset()
+
+    def reset(self):
+        # Forget every bar seen, e.g. at the start of a backtest.
+        self.last_time = None
+        self.recent = deque(maxlen = self.lookback)
+
+    def new_rows(self, window):
+        """
+        Parameters:
+        window (pd.DataFrame): The on_bar window - consecutive rows of the backtest data, including the 'time' column.
+
+        Returns:
+        rows (pd.DataFrame): The rows of the window after the last one seen.
+        """
+
+        if self.last_time is None:
+            return window
+        #Usually just the newest bar, so searched from the end.
+        times = window['time']
+        new = 0
+        while new < len(times) and utc_time(times.iloc[-new - 1]) > self.last_time:
+            new += 1
+        return window.iloc[len(times) - new:]
+
+    def frame(self, window, values):
+        """
+        Parameters:
+        window (pd.DataFrame): The on_bar window, as passed to .new_rows().
+        values (list of tuples): Indicator values per new row, in the order of columns.
+
+        Returns:
+        frame (pd.DataFrame): The last rows of the window (every new row, and at least lookback rows) with a column per indicator.
+        """
+
+        frame_values = (list(self.recent) + values)[-max(len(values), self.lookback):]
+        self.recent.extend(values)
+        self.last_time = utc_time(window['time'].iloc[-1])
+        return window.iloc[-len(frame_values):].assign(**dict(zip(self.columns, np.array(frame_values, dtype = np.float64).T)))
+
+
+class StreamingStrategy:
+    """
+    Mixin giving an indicator strategy an incremental .prepare()/.on_bar() (see BacktestRunner.runBacktest), in place of recomputing its indicators
+        over every window with .run(). The streaming indicators are fed only the bars not yet seen (the whole first window, then the newest bar),
+        so per bar cost doesn't depend on the window size, and indicators cover every bar since .prepare() - as in the strategy's .runVectorised().
+    .on_bar() leaves its window unchanged, so strategies using it don't set mutatesInput.
+
+    The strategy defines:
+        .resetIndicators() - creates its streaming indicators, and self.feed (a BarFeed of the indicator columns).
+        .update_indicators(high, low, close) - feeds one bar to the indicators, returning their values in the order of the feed columns.
+        .add_window_indicators(window) - optional, for indicators with a short fixed look back computed over the last rows of the window instead.
+        .addIndicatorDf() and .determine_signal() - as used by .run(), reading self.df.
+    """
+
+    def prepare(self, data):
+        # Streaming indicators carry state from bar to bar, so start afresh for each backtest.
+        self.resetIndicators()
+
+    def add_window_indicators(self, window):
+        pass
+
+    def on_bar(self, window):
+        """
+        Parameters:
+        window (pd.DataFrame): The last inputRowSize rows of the backtest data.
+
+        Returns:
+        (signal, indicatorDf) (tuple): As per .run() - indicatorDf covers the bars fed to the indicators (and at least the feed's lookback).
+        """
+
+        rows = self.feed.new_rows(window)
+        values = [self.update_indicators(high, low, close) for high, low, close in zip(rows['high'].values, rows['low'].values, rows['close'].values)]
+        self.df = self.feed.frame(window, values)
+        self.add_window_indicators(window)
+        self.addIndicatorDf()
+        return self.determine_signal(), self.indicatorDf
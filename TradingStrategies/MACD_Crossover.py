@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import ta
+from .IndicatorFunctions import StreamingIndicators
 
 '''
 @ Vita
@@ -8,12 +10,22 @@ https://www.dailyfx.com/forex/education/trading_tips/daily_trading_lesson/2020/0
 '''
 
 
-class MACD_Crossover:
+class MACD_Crossover(StreamingIndicators.StreamingStrategy):
 
     def __init__(self):
         
         self.Name = "MACDCrossover"
         self.indicatorDf = None
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.macd = StreamingIndicators.MACD(window_slow = 26, window_fast = 12, window_sign = 9)
+        self.feed = StreamingIndicators.BarFeed(['macd_line', 'macd_signal'], lookback = 3)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the MACD and signal lines.
+        return self.macd.update(close)[:2]
 
     def addData(self, data):
         
@@ -53,6 +65,21 @@ class MACD_Crossover:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-2]/iloc[-3] are shift(1)/shift(2).
+        macd = self.df['macd_line']
+        signal = self.df['macd_signal']
+        macd_1, signal_1 = macd.shift(1), signal.shift(1)
+        macd_2, signal_2 = macd.shift(2), signal.shift(2)
+
+        crossed = ((macd_2 < signal_2) & (macd > signal)) | ((macd_2 > signal_2) & (macd < signal))
+
+        sell = (macd > 0) & (signal > 0) & (macd_1 > 0) & (signal_1 > 0) & (macd_2 > 0) & (signal_2 > 0) & crossed
+        buy = (macd < 0) & (signal < 0) & (macd_1 < 0) & (signal_1 < 0) & (macd_2 < 0) & (signal_2 < 0) & crossed
+
+        # buy is evaluated last in determine_signal, so takes precedence
+        return np.where(buy, 1, np.where(sell, -1, 0))
+
     def addIndicatorDf(self):
         self.indicatorDf = self.df[['time', 'macd_line', 'macd_signal']]
 
@@ -61,4 +88,22 @@ class MACD_Crossover:
         self.add_macd_line()
         self.add_macd_signal_line()
         self.addIndicatorDf()
-        return self.determine_signal(), self.indicatorDf
\ No newline at end of file
+        return self.determine_signal(), self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the MACD and signal lines once over the full data, and flags every row where they have crossed within the last 3 bars
+            on one side of zero.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, macd_line and macd_signal columns aligned with it.
+        """
+
+        self.addData(data)
+        self.add_macd_line()
+        self.add_macd_signal_line()
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -1,12 +1,30 @@
 import pandas as pd
+import numpy as np
 import ta
-from .IndicatorFunctions.StochasticOscilator import StochasticOscilator
+from .IndicatorFunctions.StochasticOscilator import StochasticOscilator, StochasticOscilatorVectorised
+from .IndicatorFunctions import StreamingIndicators
+
+class pSAR_SO(StreamingIndicators.StreamingStrategy):
 
-class pSAR_SO:
     def __init__(self):
 
         self.indicatorDf = None
         self.Name = "pSAR_SO"
+        self.resetIndicators()
+
+    def resetIndicators(self):
+        # Streaming indicators, fed one bar at a time by on_bar.
+        self.pSAR = StreamingIndicators.PSAR(step = 0.02, max_step = 0.2)
+        self.feed = StreamingIndicators.BarFeed(['pSAR'], lookback = 3)
+
+    def update_indicators(self, high, low, close):
+        # One new bar - returns the pSAR.
+        return (self.pSAR.update(high, low, close),)
+
+    def add_window_indicators(self, window):
+        # The Stochastic Oscilator only looks back 2 * K bars, so is computed over the last rows of the window.
+        slow_k, slow_d = StochasticOscilatorVectorised(window.iloc[-(len(self.df) + 2 * 14 - 1):], K = 14, D = 3, slowing = 3)
+        self.df["slow_k"], self.df["slow_d"] = slow_k[-len(self.df):], slow_d[-len(self.df):]
 
     def addData(self, data):
         self.df = data
@@ -46,6 +64,19 @@ class pSAR_SO:
 
         return action
 
+    def determine_signals(self):
+        # Vectorised determine_signal over the full data - iloc[-3] is shift(2).
+        pSAR = self.df['pSAR']
+        close = self.df['close']
+        slow_k = self.df['slow_k']
+        slow_d = self.df['slow_d']
+
+        buy = (pSAR.shift(2) < close.shift(2)) & (pSAR > close) & ((slow_k < 30) | (slow_d < 30))
+        sell = (pSAR.shift(2) > close.shift(2)) & (pSAR < close) & ((slow_k > 70) | (slow_d > 70))
+
+        # buy is checked first in determine_signal (if/elif), so takes precedence
+        return np.where(buy, 1, np.where(sell, -1, 0))
+
     def run(self, data):
         self.addData(data)
         self.calculate_pSAR()
@@ -54,3 +85,21 @@ class pSAR_SO:
         signal = self.determine_signal()
 
         return signal, self.indicatorDf
+
+    def runVectorised(self, data):
+        """
+        Computes the pSAR and the Stochastic Oscilator (rolling window version, same values as run()'s loop) once over the full data, then flags pSAR flips
+            confirmed by an oversold/overbought oscillator.
+
+        Parameters:
+        data (pd.DataFrame): The full backtest data. Indicator columns are added to it, so pass a copy.
+
+        Returns:
+        (signals, indicatorDf) (tuple): np.ndarray of 1 (buy), -1 (sell) or 0 per row of data, and the time, pSAR, slow_k and slow_d columns aligned with it.
+        """
+
+        self.addData(data)
+        self.calculate_pSAR()
+        self.df["slow_k"], self.df["slow_d"] = StochasticOscilatorVectorised(self.df, K = 14, D = 3, slowing = 3)
+        self.addIndicatorDf()
+        return self.determine_signals(), self.indicatorDf
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import os
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ExecutionKernel import executeSignals, ACTIONS
+from ParameterSweep import BROKER_PARAMS, buildGrid, computeSignals, getSweepData, initWorker, runGridPoints
+
+def buildFolds(dataLength, inputRowSize, trainSize, testSize, stepSize = None, anchored = False):
+    """
+    Splits the backtest data into walk-forward train/test folds by index range.
+    Ranges are of traded bars - every fold is preceded by at least inputRowSize - 1 rows of data used only as the strategy warm-up,
+        which overlap with the previous fold's rows.
+
+    Parameters:
+    dataLength (int): Number of rows of data.
+    inputRowSize (int): As per BacktestRunner.
+    trainSize (int): Number of bars in each in-sample (training) range.
+    testSize (int): Number of bars in each out-of-sample (test) range.
+    stepSize (int = None): Number of bars between the start of each fold. Defaults to testSize, such that test ranges are consecutive.
+    anchored (bool): Whether every training range starts at the first bar (expanding), rather than rolling.
+
+    Returns:
+    folds (list of tuples): (trainStart, trainEnd, testStart, testEnd) index ranges, ends exclusive.
+    """
+
+    if stepSize is None:
+        stepSize = testSize
+    if trainSize <= 0 or testSize <= 0 or stepSize <= 0:
+        raise Exception ("Walk forward train, test and step sizes must be positive.")
+
+    #The first bar with a full input window, and the last bar with an open t+1.
+    firstIndex = inputRowSize - 1
+    stopIndex = dataLength - 1
+
+    folds = []
+    trainStart = firstIndex
+    while trainStart + trainSize < stopIndex:
+        testStart = trainStart + trainSize
+        testEnd = min(testStart + testSize, stopIndex)
+        folds.append((firstIndex if anchored else trainStart, testStart, testStart, testEnd))
+        trainStart += stepSize
+
+    if len(folds) == 0:
+        raise Exception ("Data too short for a single walk forward fold - {} rows vs inputRowSize {} + trainSize {}.".format(\
+            dataLength, inputRowSize, trainSize))
+
+    return folds
+
+def runWalkForward(Backtest, paramGrid, trainSize, testSize, stepSize = None, anchored = False, runType = 1, objective = 'Total P/L', \
+    workers = None):
+    """
+    Walk forward optimisation of the broker parameters (stop loss, take profit etc.) for a single dataset and strategy.
+    For each fold the parameter grid is searched over the training range, and the best setting is then traded over the following test range.
+
+    The data is read once (Backtest.prepData()) and the strategy signals computed once, as these don't depend on the broker parameters.
+    Folds are index ranges over those same arrays, so no data is re-read or copied per fold.
+    The in-sample searches of every fold are run together across a pool of worker processes.
+
+    The out-of-sample ranges are run in sequence with the broker state carried between them, giving one continuous (stitched) equity curve -
+        a trade open at the end of a test range is kept, with the limits it was opened with.
+    Each bar is traded once - with a stepSize below testSize, each test range starts where the previous one ended (after its own training range).
+        A stepSize above testSize would leave bars between test ranges untraded while a position is carried, so isn't allowed.
+
+    Parameters:
+    Backtest (BacktestRunner): Backtest object, after .prepData().
+    paramGrid (dict or list of dicts): Broker parameters to search - see ParameterSweep.buildGrid().
+    trainSize, testSize, stepSize, anchored: Fold set up - see buildFolds().
+    runType (int): As per BacktestRunner.runBacktest.
+    objective (str): Summary statistic or metric maximised in-sample, e.g. 'Total P/L', 'Trades Won (%)' or 'Sharpe Ratio'.
+    workers (int = None): Number of worker processes. Defaults to the number of CPUs. 1 runs in this process.
+
+    Returns:
+    folds (pd.DataFrame): One row per fold - date ranges, the chosen parameters, and in/out-of-sample results.
+    equityCurve (pd.DataFrame): Stitched out-of-sample history - time, fold, signal, action, position and cumulative Total profit.
+    inSampleResults (pd.DataFrame): Every grid point's in-sample results, per fold.
+    """
+
+    startTime = time.time()
+    grid = buildGrid(paramGrid)
+    if stepSize is not None and stepSize > testSize:
+        raise Exception ("Walk forward stepSize ({}) larger than testSize ({}) leaves bars between the stitched test ranges untraded.".format(stepSize, testSize))
+    folds = buildFolds(len(Backtest.data), Backtest.inputRowSize, trainSize, testSize, stepSize, anchored)
+
+    #Overlapping test ranges (stepSize < testSize) are clipped to start at the previous test end, such that no bar is traded twice.
+    clippedFolds = []
+    for trainStart, trainEnd, testStart, testEnd in folds:
+        if len(clippedFolds) > 0:
+            testStart = max(testStart, clippedFolds[-1][3])
+        if testStart < testEnd:
+            clippedFolds.append((trainStart, trainEnd, testStart, testEnd))
+    folds = clippedFolds
+
+    signals = computeSignals(Backtest, runType, grid[0])
+    sweepData = getSweepData(Backtest, signals)
+    signals, openPrices, highPrices, lowPrices, closePrices = sweepData[:5]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(min(workers, len(grid) * len(folds)), 1)
+
+    #In-sample parameter search
+    print("Commencing Walk Forward in-sample search: {} folds x {} broker settings".format(len(folds), len(grid)))
+    if workers == 1:
+        initWorker(sweepData)
+        foldResults = [runGridPoints(grid, trainStart, trainEnd) for trainStart, trainEnd, testStart, testEnd in folds]
+    else:
+        chunkSize = -(-len(grid) * len(folds) // (workers * 4))
+        chunkSize = max(min(chunkSize, len(grid)), 1)
+        with ProcessPoolExecutor(max_workers = workers, initializer = initWorker, initargs = (sweepData,)) as pool:
+            futures = [[pool.submit(runGridPoints, grid[i:i + chunkSize], trainStart, trainEnd) for i in range(0, len(grid), chunkSize)] \
+                for trainStart, trainEnd, testStart, testEnd in folds]
+            foldResults = [[result for future in foldFutures for result in future.result()] for foldFutures in futures]
+
+    inSampleResults = []
+    for foldNumber, results in enumerate(foldResults):
+        results = pd.DataFrame(results)
+        results.insert(0, 'Fold', foldNumber)
+        inSampleResults.append(results)
+    inSampleResults = pd.concat(inSampleResults, ignore_index = True)
+
+    if objective not in inSampleResults.columns:
+        raise Exception ("Unknown walk forward objective '{}' - please use one of {}.".format(objective, list(inSampleResults.columns[len(BROKER_PARAMS) + 1:])))
+
+    #Out-of-sample, carrying the broker state from one test range into the next
+    timeVals = Backtest.data['time']
+    state = None
+    foldRows = []
+    equityCurve = []
+    for foldNumber, (trainStart, trainEnd, testStart, testEnd) in enumerate(folds):
+        results = inSampleResults.loc[inSampleResults['Fold'] == foldNumber]
+        #Metrics without a value (e.g. a Sharpe Ratio with no trades in-sample) rank last.
+        best = results.loc[results[objective].fillna(-np.inf).idxmax()]
+        params = {name: best[name] for name in BROKER_PARAMS}
+
+        profitBefore = 0.0 if state is None else state[5]
+        tradesBefore = 0 if state is None else state[6]
+        execution = executeSignals(signals, openPrices, highPrices, lowPrices, closePrices, *[params[name] for name in BROKER_PARAMS], \
+            start = testStart, stop = testEnd, state = state)
+        state = execution['state']
+
+        foldRows.append({'Fold': foldNumber, 'Train Start': timeVals.iloc[trainStart], 'Train End': timeVals.iloc[trainEnd - 1], \
+            'Test Start': timeVals.iloc[testStart], 'Test End': timeVals.iloc[testEnd - 1], **params, \
+            'In-sample ' + objective: best[objective], 'Out-of-sample P/L': state[5] - profitBefore, 'Out-of-sample Trades': state[6] - tradesBefore})
+
+        equityCurve.append(pd.DataFrame({'time': timeVals.iloc[testStart:testEnd].values, 'Fold': foldNumber, \
+            'signal': signals[testStart:testEnd], \
+            'action': pd.Categorical.from_codes(execution['action'][testStart:testEnd], ACTIONS), \
+            'position': execution['position'][testStart:testEnd], 'Total profit': execution['Total profit'][testStart:testEnd]}))
+
+    folds = pd.DataFrame(foldRows)
+    equityCurve = pd.concat(equityCurve, ignore_index = True)
+
+    print("Walk Forward finished | Out-of-sample P/L: {} | TimeConsumed: {}".format(round(state[5], 5), \
+        datetime.timedelta(seconds = time.time() - startTime)))
+
+    return folds, equityCurve, inSampleResults
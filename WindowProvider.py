@@ -0,0 +1,60 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+class WindowProvider:
+    """
+    Class for handing strategies the inputRowSize window of data ending at a given index, without building a new dataframe for each bar.
+
+    Windows are views onto the backtest data rather than copies:
+        .window() returns a row slice of the dataframe. It should be treated as read-only, and is only copied if requested
+            (i.e. the strategy declares mutatesInput = True). Strategies opt in to the copy, rather than every window being copied,
+            as most only read their window - e.g. BB_Ext's run() adds its indicator columns to the window, while the streaming strategies' on_bar leaves it unchanged.
+        .arrays() returns read-only numpy views of each numeric column, using a strided sliding window over the contiguous column arrays.
+            For strategies declaring arrayInput = True.
+    """
+
+    def __init__(self, data, inputRowSize):
+        """
+        Parameters:
+        data (pd.DataFrame): The backtest data.
+        inputRowSize (int): Number of rows in each window.
+        """
+
+        self.data = data
+        self.inputRowSize = inputRowSize
+        self.windowViews = None
+
+    def window(self, index, copy = False):
+        """
+        Parameters:
+        index (int): The last row (inclusive) of the window.
+        copy (bool): Whether to return a copy the strategy can modify, rather than a view.
+
+        Returns:
+        window (pd.DataFrame): The inputRowSize rows of data up to and including index.
+        """
+
+        window = self.data.iloc[index - self.inputRowSize + 1:index + 1]
+        if copy:
+            return window.copy()
+        return window
+
+    def arrays(self, index):
+        """
+        Parameters:
+        index (int): The last row (inclusive) of the window.
+
+        Returns:
+        windows (dict): Column name -> read-only numpy array of the inputRowSize values up to and including index.
+        """
+
+        if self.windowViews is None:
+            #Set up once - each view has one row per window start, sharing memory with the column it was built from.
+            self.windowViews = {}
+            for column in self.data.columns:
+                values = self.data[column].values
+                if isinstance(values, np.ndarray) and values.dtype.kind in 'iufb':
+                    values = np.ascontiguousarray(values)
+                    self.windowViews[column] = sliding_window_view(values, self.inputRowSize)
+
+        return {column: views[index - self.inputRowSize + 1] for column, views in self.windowViews.items()}
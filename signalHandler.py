@@ -2,9 +2,16 @@ import pandas as pd
 import numpy as np
 import datetime
 import warnings
+from ExecutionKernel import executeSignals, ACTIONS, EXIT_REASONS, BUY, SHORT, CLOSE_LONG, CLOSE_SHORT
 warnings.simplefilter(action='ignore', category=FutureWarning)
 pd.set_option('mode.chained_assignment', None)
 
+#Codes stored in the action buffer - see ExecutionKernel.ACTIONS. -1 is used for rows without an action (e.g. warm up rows).
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+#Trade ledger columns - one row per trade, filled in as the trade is opened and closed (see getLedger).
+LEDGER_COLUMNS = ['Trade Type', 'Entry Index', 'Entry Price', 'Exit Index', 'Exit Price', 'Gross P/L', 'Brokerage Cost', 'Trade P/L', 'Exit Reason']
+
 class signalHandler:
     """
     Class for acting as a broker or handling signals of the backtest process.
@@ -45,33 +52,27 @@ class signalHandler:
         self.start_date = start_date
         self.end_date = end_date                
         self.storeIndicators = storeIndicators
-        if self.storeIndicators == 1:
-            self.indicatorDf = pd.DataFrame()        
+        #Indicator store - preallocated per column once the first indicatorDF is received (see storeSignalAndIndicators).
+        self.indicatorStore = None
 
         self.prev_traded_position = 0
         self.prev_traded_price = None
+        self.prev_brokerage_cost = None
+        self.stop_loss_px = 0
+        self.take_profit_px = 0
         self.total_profit = 0
 
-        data['signal'] = ''
-        data['action'] = ''
-        data['position'] = ''
-        data['Trade P/L'] = ''
-        data['Brokerage Cost'] = ''
-        data['Total profit'] = ''
-        data['Executed price'] = ''
-        data['Take Profit'] = ''
-        data['Stop Loss'] = ''
-
+        #History buffers - preallocated and typed. Prices/PnL are nan where not set (e.g. no trade executed at that row).
         n = len(data) - 1
-        self.signal_list = [""]*n
-        self.action = [""]*n
-        self.position = [""]*n
-        self.arr_broker_cost = [""]*n 
-        self.arr_PL = [""]*n 
-        self.arr_total_profit = [""]*n 
-        self.executed_price = [""]*n
-        self.stop_loss_px_list = [""]*n
-        self.take_profit_px_list = [""]*n
+        self.signal_list = np.zeros(n, dtype = np.int8)
+        self.action = np.full(n, -1, dtype = np.int8)
+        self.position = np.zeros(n, dtype = np.int8)
+        self.arr_broker_cost = np.full(n, np.nan)
+        self.arr_PL = np.full(n, np.nan)
+        self.arr_total_profit = np.full(n, np.nan)
+        self.executed_price = np.full(n, np.nan)
+        self.stop_loss_px_list = np.full(n, np.nan)
+        self.take_profit_px_list = np.full(n, np.nan)
         self.current_action = ""
         
         self.trades_total = 0
@@ -80,6 +81,9 @@ class signalHandler:
         self.trades_tied = 0       
         self.summary_df = pd.DataFrame()
 
+        #Trade ledger - lists per LEDGER_COLUMNS, a row per trade.
+        self.ledger = {column: [] for column in LEDGER_COLUMNS}
+
     def bandPL(self, PL, executed_price):
         """
         A function for finalising the PL level as well as hitting guaranteed stoploss/take profit.
@@ -108,17 +112,20 @@ class signalHandler:
         PL -= total_brokerage
         return PL
 
-    def closeTrade(self, PL, executed_price, index):
+    def closeTrade(self, PL, executed_price, index, reason):
         """
         Function called to handle updating attributes once a trade is closed.
         Parameters:
         PL (float): The P&L after bandPL to be added to the total profit.
+        reason (str): Why the trade is closed, one of ExecutionKernel.EXIT_REASONS.
         """
         
         #Count in total trades
         self.trades_total += 1
 
+        gross_PL = PL
         PL = self.bandPL(PL, executed_price)
+        self.recordClose(index, executed_price, gross_PL, self.curr_broker_cost + self.prev_brokerage_cost, PL, reason)
 
         # Reseting Current position,action and other attributes.
         if self.prev_traded_position == -1:
@@ -148,6 +155,63 @@ class signalHandler:
 
         self.prev_brokerage_cost = None
         
+    def recordOpen(self, index, executed_price):
+        """
+        Function used to add a newly opened trade to the ledger.
+
+        Parameters:
+        index (int): The index the trade is opened at, in reference to the history data.
+        executed_price (float): The entry price.
+        """
+
+        self.ledger['Trade Type'].append("buy" if self.prev_traded_position == 1 else "short")
+        self.ledger['Entry Index'].append(index)
+        self.ledger['Entry Price'].append(executed_price)
+        for column in LEDGER_COLUMNS[3:]:
+            self.ledger[column].append(None)
+
+    def recordClose(self, index, executed_price, gross_PL, brokerage_cost, PL, reason):
+        """
+        Function used to fill in the exit of the open trade in the ledger.
+
+        Parameters:
+        index (int): The index the trade is closed at, in reference to the history data.
+        executed_price (float): The exit price.
+        gross_PL (float): The P&L of the price move, before any guaranteed limit and costs.
+        brokerage_cost (float): The entry + exit brokerage cost.
+        PL (float): The net P&L, as added to the total profit.
+        reason (str): One of ExecutionKernel.EXIT_REASONS.
+        """
+
+        for column, value in zip(LEDGER_COLUMNS[3:], [index, executed_price, gross_PL, brokerage_cost, PL, reason]):
+            self.ledger[column][-1] = value
+
+    def getLedger(self):
+        """
+        Function used to get the trade ledger, as recorded when trades are opened and closed.
+
+        Returns:
+        ledger (pd.DataFrame): One row per trade - Trade Type ('buy'/'short'), Entry Index/Time/Price, Exit Index/Time/Price,
+            Gross P/L (the price move), Brokerage Cost (entry + exit), Trade P/L (net, as added to the total profit) and Exit Reason.
+            A trade still open at the end of the backtest has an Exit Index of -1 and no exit details.
+        """
+
+        ledger = pd.DataFrame(self.ledger, columns = LEDGER_COLUMNS)
+        for column in ['Entry Index', 'Exit Index']:
+            ledger[column] = ledger[column].fillna(-1).astype(np.int64)
+        for column in ['Entry Price', 'Exit Price', 'Gross P/L', 'Brokerage Cost', 'Trade P/L']:
+            ledger[column] = ledger[column].astype(np.float64)
+        ledger['Exit Reason'] = ledger['Exit Reason'].fillna('')
+
+        #Times looked up per trade, -1 indexes (unknown entry/still open) have none.
+        times = self.data['time']
+        for prefix in ['Entry', 'Exit']:
+            indexes = ledger[prefix + ' Index'].values
+            ledger.insert(ledger.columns.get_loc(prefix + ' Index') + 1, prefix + ' Time', \
+                times.iloc[np.maximum(indexes, 0)].where(indexes >= 0).reset_index(drop = True))
+
+        return ledger
+
     def saveStats(self, PL, index):
         """
         Function used to save stats for the results files.
@@ -157,7 +221,7 @@ class signalHandler:
         index (int): The input index for where to save the stats in context of the history file.
         """
                 
-        self.action[index] = self.current_action
+        self.action[index] = ACTION_CODES[self.current_action]
         self.arr_PL[index] = PL
         self.arr_total_profit[index] = self.total_profit
         self.position[index] = self.prev_traded_position
@@ -176,25 +240,42 @@ class signalHandler:
         
         self.data = self.data.iloc[:-1] #Drop end as we have been executing at OpenT+1
 
-        self.data['signal'] = self.signal_list
-        self.data['action'] = self.action
-        self.data['position'] = self.position
-        self.data['Trade P/L'] = self.arr_PL
-        self.data['Brokerage Cost'] = self.arr_broker_cost
-        self.data['Total profit'] = self.arr_total_profit
-        self.data['Executed price'] = self.executed_price
-        self.data['Stop Loss'] = self.stop_loss_px_list
-        self.data['Take Profit'] = self.take_profit_px_list
-
-        #Indicator DF
-        if self.storeIndicators == 1:
-            insertIdx = self.data.columns.get_loc('signal')
-            insertDF = self.indicatorDf.drop(columns = 'time')
-            for i in range(len(insertDF.columns)):
-                self.data.insert(loc = i + insertIdx, column = insertDF.columns.values[i], value = insertDF.iloc[:, i])
+        historyDf = pd.DataFrame({'signal': self.signal_list,
+            'action': pd.Categorical.from_codes(self.action, categories = ACTIONS),
+            'position': self.position,
+            'Trade P/L': self.arr_PL,
+            'Brokerage Cost': self.arr_broker_cost,
+            'Total profit': self.arr_total_profit,
+            'Executed price': self.executed_price,
+            'Take Profit': self.take_profit_px_list,
+            'Stop Loss': self.stop_loss_px_list}, index = self.data.index)
+
+        #Indicator DF - placed between the input data and the history columns
+        if self.storeIndicators == 1 and self.indicatorStore is not None:
+            indicatorDf = pd.DataFrame(self.indicatorStore, index = self.data.index)
+            self.data = pd.concat([self.data, indicatorDf, historyDf], axis = 1)
+        else:
+            self.data = pd.concat([self.data, historyDf], axis = 1)
 
         return self.data
     
+    def getReportColumns(self, start = 0):
+        """
+        Function used to get only the history columns the summary reports are built from, without building the full history (see getHistory).
+
+        Parameters:
+        start (int): The first index to include, generally inputRowSize - 1.
+
+        Returns:
+        reportData (pd.DataFrame): time, action, position and Total profit from start, with a fresh index.
+        """
+
+        n = len(self.action)
+        return pd.DataFrame({'time': self.data['time'].iloc[start:n].reset_index(drop = True),
+            'action': pd.Categorical.from_codes(self.action[start:], categories = ACTIONS),
+            'position': self.position[start:],
+            'Total profit': self.arr_total_profit[start:]})
+
     def getSummary(self):
         """
         Function used for the summary of the backtest results.
@@ -211,7 +292,7 @@ class signalHandler:
         self.summary_df['Asset'] = [self.asset]
         self.summary_df['Frequency'] = [self.frequency]
         self.summary_df['Total Trades'] = [self.trades_total]
-        self.summary_df['Total P/L'] = [self.data['Total profit'].iloc[-1]]
+        self.summary_df['Total P/L'] = [self.total_profit]
         self.summary_df['Trades Won (n)'] = [self.trades_won]
         self.summary_df['Trades Won (%)'] = [(self.trades_won/self.trades_total) * 100 if self.trades_total > 0 else 0]
         self.summary_df['Trades Lost (n)'] = [self.trades_lost]
@@ -232,12 +313,50 @@ class signalHandler:
         """
 
         if self.storeIndicators == 1 and indicatorDf is not None:
-            if self.indicatorDf.empty:
-                self.indicatorDf = indicatorDf
+            if self.indicatorStore is None:
+                #First indicatorDF sets the schema, and also covers the rows leading up to this index.
+                self.initialiseIndicatorStore(indicatorDf)
+                rows = min(len(indicatorDf), index + 1)
+                for column, values in self.indicatorStore.items():
+                    values[index - rows + 1:index + 1] = indicatorDf[column].values[-rows:]
             else:
-                self.indicatorDf = self.indicatorDf.append(indicatorDf.iloc[-1], ignore_index=True)
+                for column, values in self.indicatorStore.items():
+                    values[index] = indicatorDf[column].values[-1]
         self.signal_list[index] = signal
-        
+
+    def initialiseIndicatorStore(self, indicatorDf):
+        """
+        A function used to preallocate the indicator store, one array per indicator column sized to the history data.
+        Float columns are stored as float64 (nan where not calculated), anything else as object.
+
+        Parameters:
+        indicatorDF (pd.DataFrame): An indicator dataframe from the trading strategy, used for the column schema. The 'time' column is not stored.
+        """
+
+        n = len(self.data) - 1
+        self.indicatorStore = {}
+        for column in indicatorDf.columns:
+            if column == 'time':
+                continue
+            if pd.api.types.is_float_dtype(indicatorDf[column]):
+                self.indicatorStore[column] = np.full(n, np.nan)
+            else:
+                self.indicatorStore[column] = np.full(n, None, dtype = object)
+
+    def storeIndicatorFrame(self, indicatorDf):
+        """
+        A function used to store a full indicator dataframe in one step, for strategies that compute indicators over the whole dataset (runType 4).
+
+        Parameters:
+        indicatorDF (pd.DataFrame): The dataframe containing indicator values, one row per row of the history data.
+        """
+
+        if self.storeIndicators == 1:
+            self.initialiseIndicatorStore(indicatorDf)
+            n = len(self.data) - 1
+            for column, values in self.indicatorStore.items():
+                values[:] = indicatorDf[column].values[:n]
+
     def store_executed_price(self, executed_price, index):
         """
         A function to store the trade executed price in the history.
@@ -251,6 +370,110 @@ class signalHandler:
         self.executed_price[index] = executed_price
         self.arr_broker_cost[index] = self.curr_broker_cost
 
+    def executeSignals(self, signals, startIndex):
+        """
+        Alternative to calling buy/sell/checkStopConditions at every iteration - executes all stored signals in one pass of the
+        array based execution kernel (see ExecutionKernel), then stores the results as the per bar methods would have.
+
+        Parameters:
+        signals (array-like of int): Signals for every row of the data (rows before startIndex are ignored).
+        startIndex (int): The first index to execute, generally inputRowSize - 1.
+        """
+
+        n = len(self.data) - 1
+        results = executeSignals(signals, self.data['open'].values, self.data['high'].values, self.data['low'].values, self.data['close'].values, \
+            self.original_stop_loss, self.original_take_profit, self.guaranteed_sl, self.broker_cost, self.limit_type, \
+            self.dynamic_limits, self.hold_direction, start = startIndex, stop = n, state = self.getState())
+
+        self.action[startIndex:] = results['action'][startIndex:]
+        self.position[startIndex:] = results['position'][startIndex:]
+        self.arr_PL[startIndex:] = results['Trade P/L'][startIndex:]
+        self.arr_total_profit[startIndex:] = results['Total profit'][startIndex:]
+        self.arr_broker_cost[startIndex:] = results['Brokerage Cost'][startIndex:]
+        self.executed_price[startIndex:] = results['Executed price'][startIndex:]
+        self.stop_loss_px_list[startIndex:] = results['Stop Loss'][startIndex:]
+        self.take_profit_px_list[startIndex:] = results['Take Profit'][startIndex:]
+        self.recordLedger(results, startIndex)
+
+        self.setState(results['state'])
+
+    def recordLedger(self, results, startIndex):
+        """
+        Function used to add the trades of an execution kernel run to the ledger, as recordOpen/recordClose would have.
+        Trades are paired from the opening/closing indexes, so this is O(trades) - to be called before the kernel's final state is set.
+
+        Parameters:
+        results (dict): As returned by ExecutionKernel.executeSignals.
+        startIndex (int): The first index executed.
+        """
+
+        action = results['action'][startIndex:]
+        opens = np.flatnonzero((action == BUY) | (action == SHORT)) + startIndex
+        closes = np.flatnonzero((action == CLOSE_LONG) | (action == CLOSE_SHORT)) + startIndex
+
+        #A position held coming into the run (already in the ledger) is closed first.
+        entryCosts = results['Brokerage Cost'][opens]
+        if self.prev_traded_position != 0:
+            entryCosts = np.r_[self.prev_brokerage_cost, entryCosts]
+
+        self.ledger['Trade Type'].extend(np.where(results['action'][opens] == BUY, "buy", "short").tolist())
+        self.ledger['Entry Index'].extend(opens.tolist())
+        self.ledger['Entry Price'].extend(results['Executed price'][opens].tolist())
+        for column in LEDGER_COLUMNS[3:]:
+            self.ledger[column].extend([None] * len(opens))
+
+        #As per closeTrade/bandPL.
+        gross_PL = results['Trade P/L'][closes]
+        brokerage_cost = results['Brokerage Cost'][closes] + entryCosts[:len(closes)]
+        PL = gross_PL
+        if self.guaranteed_sl:
+            PL = np.where(PL > self.take_profit, self.take_profit, np.where(PL < self.stop_loss, self.stop_loss, PL))
+        PL = PL - brokerage_cost
+
+        first = len(self.ledger['Exit Index']) - len(entryCosts)
+        exits = [closes, results['Executed price'][closes], gross_PL, brokerage_cost, PL, np.array(EXIT_REASONS)[results['Exit reason'][closes]]]
+        for column, values in zip(LEDGER_COLUMNS[3:], exits):
+            self.ledger[column][first:first + len(closes)] = values.tolist()
+
+    def getState(self):
+        """
+        Returns the broker state (open position, limits, profit and trade counts) in the form of ExecutionKernel.initialState(),
+        such that a following backtest - e.g. the next chunk of a chunked backtest - can continue from it via .setState().
+
+        Returns:
+        state (tuple): (position, entry price, stop loss price, take profit price, entry brokerage cost, total profit,
+            trades total, trades won, trades lost, trades tied)
+        """
+
+        return (int(self.prev_traded_position), np.nan if self.prev_traded_price is None else float(self.prev_traded_price), \
+            float(self.stop_loss_px), float(self.take_profit_px), np.nan if self.prev_brokerage_cost is None else float(self.prev_brokerage_cost), \
+            float(self.total_profit), int(self.trades_total), int(self.trades_won), int(self.trades_lost), int(self.trades_tied))
+
+    def setState(self, state):
+        """
+        Sets the broker state, as returned by .getState() or the execution kernel.
+        An open position not yet in the ledger is added to it, with an Entry Index of -1.
+
+        Parameters:
+        state (tuple): See .getState().
+        """
+
+        position, entryPrice, slPx, tpPx, prevCost, totalProfit, tradesTotal, tradesWon, tradesLost, tradesTied = state
+        self.prev_traded_position = int(position)
+        self.prev_traded_price = None if position == 0 else entryPrice
+        self.stop_loss_px = slPx
+        self.take_profit_px = tpPx
+        self.prev_brokerage_cost = None if position == 0 else prevCost
+        self.total_profit = totalProfit
+        self.trades_total = int(tradesTotal)
+        self.trades_won = int(tradesWon)
+        self.trades_lost = int(tradesLost)
+        self.trades_tied = int(tradesTied)
+
+        #A position carried over from a previous backtest enters the ledger with an unknown entry index of -1.
+        if position != 0 and (len(self.ledger['Exit Index']) == 0 or self.ledger['Exit Index'][-1] is not None):
+            self.recordOpen(-1, self.prev_traded_price)
+
     ############### Actions ###############
     def buy(self, open_priceT1, high_price, low_price, close_price, index):
         """
@@ -290,6 +513,7 @@ class signalHandler:
             self.saveStats(PL, index)
             self.store_executed_price(open_priceT1, index)
             self.prev_brokerage_cost = self.curr_broker_cost
+            self.recordOpen(index, open_priceT1)
 
         elif self.prev_traded_position == 1:
             # Reciving a stroger buy signal
@@ -304,14 +528,14 @@ class signalHandler:
             else:
                 self.current_action = "close short"
                 PL = (self.prev_traded_position*(open_priceT1 - self.prev_traded_price)) #Executed at ask for a buy 
-                self.closeTrade(PL, open_priceT1, index)
+                self.closeTrade(PL, open_priceT1, index, "reversal")
                 self.saveStats(PL,index)
                 self.store_executed_price(open_priceT1, index)
 
         else: 
             raise Exception ("Unknown Signal!")
         
-        self.curr_broker_cost = ""
+        self.curr_broker_cost = np.nan
 
     def sell(self, open_priceT1, high_price, low_price, close_price, index):
         """
@@ -352,6 +576,7 @@ class signalHandler:
             self.saveStats(PL, index)
             self.store_executed_price(open_priceT1, index)
             self.prev_brokerage_cost = self.curr_broker_cost
+            self.recordOpen(index, open_priceT1)
 
         elif self.prev_traded_position == -1:
             # Reciving a stronger sell signal,             
@@ -366,13 +591,13 @@ class signalHandler:
             else:
                 self.current_action = "close long"
                 PL = (self.prev_traded_position*(open_priceT1 - self.prev_traded_price)) #Executed at bid for a sell + flat spread
-                self.closeTrade(PL, open_priceT1, index)
+                self.closeTrade(PL, open_priceT1, index, "reversal")
                 self.saveStats(PL,index)
                 self.store_executed_price(open_priceT1, index)
         else: 
             raise Exception ("Unknown Signal!")
 
-        self.curr_broker_cost = ""
+        self.curr_broker_cost = np.nan
     
     def checkStopConditions(self, close_price, high_price, low_price, index):
         """
@@ -401,12 +626,12 @@ class signalHandler:
             #Take Profit
             if low_price <= self.take_profit_px:                
                 PL = self.prev_traded_price - low_price
-                self.closeTrade(PL, low_price, index)
+                self.closeTrade(PL, low_price, index, "take profit")
 
             #Stop Loss
             elif high_price >= self.stop_loss_px:
                 PL = self.prev_traded_price - high_price
-                self.closeTrade(PL, high_price, index)
+                self.closeTrade(PL, high_price, index, "stop loss")
 
         #Long
         elif self.prev_traded_position == 1:
@@ -416,12 +641,12 @@ class signalHandler:
             #Take Profit
             if high_price >= self.take_profit_px:
                 PL = high_price - self.prev_traded_price
-                self.closeTrade(PL, high_price, index)  
+                self.closeTrade(PL, high_price, index, "take profit")  
 
             #Stop Loss
             elif low_price <= self.stop_loss_px:
                 PL = low_price - self.prev_traded_price
-                self.closeTrade(PL, low_price, index)         
+                self.closeTrade(PL, low_price, index, "stop loss")         
 
         self.saveStats(PL,index)
         return self.total_profit
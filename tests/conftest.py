@@ -0,0 +1,7 @@
+import os
+import sys
+
+#The modules are top level files of the repository.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ExampleDatasets')
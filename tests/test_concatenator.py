@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataFunctions.DataConcatenator import ratesTicksConcatenator
+
+ROWS = 30
+#Rates rows without a tick - one at each edge of the data, and a pair in the middle.
+MISSING = [1, 15, 16, 28]
+
+def makeData(ratesUnit = 'ns', ticksUnit = 'ns'):
+    times = pd.date_range('2022-01-03 01:00', periods = ROWS, freq = 'min')
+    close = 1.13 + 0.0001 * np.arange(ROWS)
+    ratesDat = pd.DataFrame({'DATETIME': times.values.astype('datetime64[{}]'.format(ratesUnit)), 'OPEN': close, 'HIGH': close + 0.0005, \
+        'LOW': close - 0.0005, 'CLOSE': close})
+
+    #Distinct spreads per row, such that each replaced value tells which rows were averaged.
+    bidSpread = 0.00001 * (np.arange(ROWS) % 7 + 1)
+    askSpread = 0.00002 * (np.arange(ROWS) % 5 + 1)
+    ticked = np.setdiff1d(np.arange(ROWS), MISSING)
+    #Ticks land mid bar, apart from the first and last which set the dates the data is trimmed to.
+    tickTimes = times[ticked] + pd.to_timedelta(np.where((ticked > 0) & (ticked < ROWS - 1), 10, 0), unit = 's')
+    ticksDat = pd.DataFrame({'DATETIME': tickTimes.values.astype('datetime64[{}]'.format(ticksUnit)), \
+        'BID': close[ticked] - bidSpread[ticked], 'ASK': close[ticked] + askSpread[ticked]})
+
+    return ratesDat, ticksDat, bidSpread, askSpread
+
+@pytest.mark.parametrize('ratesUnit, ticksUnit', [('ns', 'ns'), ('ns', 'us'), ('us', 'ns')])
+def test_tick_matching_across_time_resolutions(ratesUnit, ticksUnit):
+    ratesDat, ticksDat, bidSpread, askSpread = makeData(ratesUnit, ticksUnit)
+    concatDF = ratesTicksConcatenator(ratesDat, ticksDat, 'min', ticksCleanFlag = 2)
+
+    assert (concatDF['ReplacedBidAsk'] == 'Replaced').values.nonzero()[0].tolist() == MISSING
+    matched = concatDF['ReplacedBidAsk'] == ''
+    np.testing.assert_allclose(concatDF.loc[matched, 'BID'], ratesDat['CLOSE'][matched] - bidSpread[matched])
+    np.testing.assert_allclose(concatDF.loc[matched, 'ASK'], ratesDat['CLOSE'][matched] + askSpread[matched])
+
+def test_replacement_spread_window():
+    ratesDat, ticksDat, bidSpread, askSpread = makeData()
+    concatDF = ratesTicksConcatenator(ratesDat, ticksDat, 'min', ticksCleanFlag = 1)
+
+    #The 10 valid rows averaged for each missing row - 5 before/5 after, shifted forward at the start and back at the end of the data.
+    windows = {1: [0, 2, 3, 4, 5, 6, 7, 8, 9, 10], 
+        15: [10, 11, 12, 13, 14, 17, 18, 19, 20, 21], 
+        16: [10, 11, 12, 13, 14, 17, 18, 19, 20, 21], 
+        28: [19, 20, 21, 22, 23, 24, 25, 26, 27, 29]}
+    for row, window in windows.items():
+        close = ratesDat['CLOSE'].iloc[row]
+        assert concatDF['BID'].iloc[row] == pytest.approx(close - np.round(bidSpread[window].mean(), 5), abs = 1e-12)
+        assert concatDF['ASK'].iloc[row] == pytest.approx(close + np.round(askSpread[window].mean(), 5), abs = 1e-12)
@@ -0,0 +1,28 @@
+import os
+import multiprocessing
+
+from BacktestRunner import BacktestRunner
+from TradingStrategies.MACD_Crossover import MACD_Crossover
+
+SUBFOLDER = "AAL.L.csv_010122_301122"
+
+def createFolders(exportFolder, barrier, count):
+    #Every process creates its folders at the same time, as BatchRunner workers backtesting the same asset and dates can.
+    barrier.wait()
+    folders = []
+    for _ in range(count):
+        Backtest = BacktestRunner(None, None, 40, MACD_Crossover, exportFolder, 0)
+        Backtest.subFolderName = SUBFOLDER
+        folders.append(Backtest.createExportFolder())
+    return folders
+
+def test_parallel_backtests_get_separate_folders(tmp_path):
+    processes, count = 8, 5
+    with multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(processes)
+        with multiprocessing.Pool(processes) as pool:
+            folders = sum(pool.starmap(createFolders, [(str(tmp_path), barrier, count)] * processes), [])
+
+    assert len(set(folders)) == processes * count
+    assert sorted(os.listdir(os.path.join(str(tmp_path), "MACDCrossover"))) == \
+        sorted([SUBFOLDER] + ["{}_{}".format(SUBFOLDER, counter) for counter in range(1, processes * count)])
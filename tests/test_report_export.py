@@ -0,0 +1,26 @@
+import os
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+
+from conftest import DATASETS_DIR
+from BacktestRunner import BacktestRunner
+from TradingStrategies.MACD_Crossover import MACD_Crossover
+
+def test_npz_history_loads_without_pickle(tmp_path):
+    Backtest = BacktestRunner(None, None, 40, MACD_Crossover, str(tmp_path), 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Backtest.prepData(os.path.join(DATASETS_DIR, 'BP.L.csv'), 0, 0)
+        Backtest.loadBroker(-0.02, 0.05, False, 0.002, 'Percentage', False, True)
+        Backtest.runBacktest(4, 'kernel')
+        Backtest.runReports(exportMode = 'npz')
+
+    subfolderDir = os.path.join(Backtest.exportSubdir, Backtest.subFolderName)
+    with np.load(os.path.join(subfolderDir, 'History.npz'), allow_pickle = False) as history:
+        assert history['action'].dtype.kind == 'U'
+        assert history['time'].dtype.kind == 'M'
+        actions = pd.Series(history['action'])
+
+    trades = pd.read_csv(os.path.join(subfolderDir, 'Trade_Summary.csv'))
+    assert actions.isin(['close long', 'close short']).sum() == len(trades)
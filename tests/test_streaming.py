@@ -0,0 +1,40 @@
+import os
+import io
+import contextlib
+import numpy as np
+import pytest
+
+from conftest import DATASETS_DIR
+from BacktestRunner import BacktestRunner
+from WindowProvider import WindowProvider
+from TradingStrategies.BB_ATR import BB_ATR
+from TradingStrategies.MACD_Crossover import MACD_Crossover
+from TradingStrategies.pSAR_SO import pSAR_SO
+from TradingStrategies.BB_Simple import BB_Simple
+from TradingStrategies.M5 import M5
+from TradingStrategies.BBmidline import M5 as BBmidline
+from TradingStrategies.BB_RSI_Spread import BB_RSI_Spread
+from TradingStrategies.BBmv50 import BBmv50
+
+INPUT_ROW_SIZE = 40
+
+@pytest.fixture(scope = 'module')
+def data():
+    Backtest = BacktestRunner(None, None, INPUT_ROW_SIZE, None, None, 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Backtest.prepData(os.path.join(DATASETS_DIR, 'AAL.L.csv'), 0, 0)
+    return Backtest.data.iloc[:1500].reset_index(drop = True)
+
+#Price scale per strategy - BBmv50's fixed (FX pip sized) thresholds are only hit once the share prices are scaled to FX levels.
+@pytest.mark.parametrize('strategyClass, scale', [(BB_ATR, 1), (MACD_Crossover, 1), (pSAR_SO, 1), (BB_Simple, 1), (M5, 1), (BBmidline, 1), (BB_RSI_Spread, 1), \
+    (BBmv50, 5000)])
+def test_on_bar_matches_vectorised(data, strategyClass, scale):
+    data = data.copy()
+    data[['open', 'high', 'low', 'close']] /= scale
+    expected, _ = strategyClass().runVectorised(data.copy())
+    strategy = strategyClass()
+    strategy.prepare(data)
+    windowFeed = WindowProvider(data, INPUT_ROW_SIZE)
+    signals = [strategy.on_bar(windowFeed.window(index))[0] for index in range(INPUT_ROW_SIZE - 1, len(data))]
+    assert np.array_equal(signals, expected[INPUT_ROW_SIZE - 1:])
+    assert np.any(expected != 0)
@@ -0,0 +1,50 @@
+import os
+import datetime
+import pytz
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATASETS_DIR
+from BacktestRunner import BacktestRunner
+from OHLCStore import FrameStore
+
+def maskWindow(Backtest, fullData):
+    #Date trimming by boolean masks over the time column, as prepData did before FrameStore.
+    if Backtest.startDate >= fullData['time'].iloc[-1] or Backtest.startDate > Backtest.endDate or Backtest.endDate <= fullData['time'].iloc[0]:
+        return None
+    startIdx = fullData.index[fullData['time'] >= Backtest.startDate][0]
+    startIdxAdj = max((startIdx - Backtest.inputRowSize + 1), 0)
+    endIdx = min((fullData.index[fullData['time'] <= Backtest.endDate][-1] + 1), fullData.index[-1])
+    if len(fullData[startIdx:endIdx]) <= Backtest.inputRowSize:
+        return None
+    return fullData[startIdxAdj:endIdx].reset_index(drop = True)
+
+@pytest.mark.parametrize('dataFile', ['AAL.L.csv', 'BP.L.csv'])
+def test_frame_store_windows_match_masks(dataFile):
+    #The bundled Yahoo datasets have a mix of utc offsets (daylight saving), so take the instant comparison path of FrameStore.
+    Backtest = BacktestRunner(None, None, 35, None, None)
+    fullData, _ = Backtest.readData(os.path.join(DATASETS_DIR, dataFile))
+    store = FrameStore(fullData)
+    first, last = pd.Timestamp(fullData['time'].iloc[0]), pd.Timestamp(fullData['time'].iloc[-1])
+
+    rng = np.random.default_rng(0)
+    windows = [(datetime.datetime(2020, 1, 1, tzinfo = pytz.utc), datetime.datetime(2022, 11, 30, tzinfo = pytz.utc))]
+    for i in range(100):
+        start = first + (last - first) * rng.uniform(-0.1, 1.1)
+        end = start + (last - first) * rng.uniform(-0.05, 0.5)
+        windows.append((start.to_pydatetime().astimezone(pytz.utc), end.to_pydatetime().astimezone(pytz.utc)))
+
+    for startDate, endDate in windows:
+        Backtest.startDate, Backtest.endDate = startDate, endDate
+        expected = maskWindow(Backtest, fullData)
+        if expected is None:
+            with pytest.raises(Exception):
+                Backtest.trimData(store)
+        else:
+            pd.testing.assert_frame_equal(Backtest.trimData(store), expected)
+
+def test_prep_data_use_dates():
+    Backtest = BacktestRunner(datetime.datetime(2020, 1, 1, tzinfo = pytz.utc), datetime.datetime(2022, 11, 30, tzinfo = pytz.utc), 35, None, None)
+    Backtest.prepData(os.path.join(DATASETS_DIR, 'AAL.L.csv'), 1, 0)
+    assert len(Backtest.data) == 770
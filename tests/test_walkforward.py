@@ -0,0 +1,35 @@
+import os
+import io
+import contextlib
+import numpy as np
+import pytest
+
+from conftest import DATASETS_DIR
+from BacktestRunner import BacktestRunner
+from WalkForward import runWalkForward
+from TradingStrategies.MACD_Crossover import MACD_Crossover
+
+GRID = {'stopLoss': [-0.02, -0.05], 'takeProfit': [0.05], 'guaranteedSl': [False], 'brokerCost': [0.002], 'limitType': ['Percentage'], \
+    'dynamicLimits': [False], 'holdDirection': [True]}
+
+@pytest.fixture(scope = 'module')
+def Backtest():
+    Backtest = BacktestRunner(None, None, 35, MACD_Crossover, None, 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Backtest.prepData(os.path.join(DATASETS_DIR, 'BP.L.csv'), 0, 0)
+    return Backtest
+
+def runQuietly(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return runWalkForward(*args, **kwargs)
+
+def test_overlapping_test_ranges_trade_each_bar_once(Backtest):
+    folds, equityCurve, inSampleResults = runQuietly(Backtest, GRID, 2000, 500, stepSize = 250, workers = 1)
+    assert not equityCurve['time'].duplicated().any()
+    #Contiguous from the first test bar to the last bar with an open t+1.
+    assert len(equityCurve) == len(Backtest.data) - 1 - (Backtest.inputRowSize - 1 + 2000)
+    assert np.isclose(folds['Out-of-sample P/L'].sum(), equityCurve['Total profit'].iloc[-1])
+
+def test_step_larger_than_test_is_rejected(Backtest):
+    with pytest.raises(Exception):
+        runQuietly(Backtest, GRID, 2000, 250, stepSize = 500, workers = 1)